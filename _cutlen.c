@@ -0,0 +1,17 @@
+/* Kernel C opcional: soma dos comprimentos de segmento de uma polilinha
+   achatada (pares x,y intercalados). Compilado em tempo de execução por
+   dxf_cut_time._load_cutlen(); na ausência de compilador o Python usa o
+   caminho NumPy normalmente. */
+#include <math.h>
+#include <stddef.h>
+
+double sum_hypot(const double *xy, size_t n)
+{
+    double s = 0.0;
+    for (size_t i = 1; i < n; i++) {
+        double dx = xy[2 * i] - xy[2 * i - 2];
+        double dy = xy[2 * i + 1] - xy[2 * i - 1];
+        s += sqrt(dx * dx + dy * dy);
+    }
+    return s;
+}
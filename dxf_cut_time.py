@@ -18,75 +18,279 @@ Opções:
 """
 
 import argparse
-import csv
-import math
-import ezdxf
+import ctypes
+import hashlib
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from ezdxf.addons import iterdxf
 from ezdxf.path import make_path
 
 # -----------------------------
 # Tabela de velocidades (m/min)
 # -----------------------------
-CUT_SPEED = {
-    "Inox": {
-        2.0: 2.7,
-        3.0: 1.8,
-        4.0: 1.0,
-    },
-    "Carbono": {
-        2.0: 2.7,
-        3.0: 1.5,
-        3.75: 1.2,
-        4.75: 0.8,
-    },
-}
+# Já ordenada por espessura; congelada em tuplas para iterar sem sorted()
+CUT_SPEED = (
+    ("Inox", (
+        (2.0, 2.7),
+        (3.0, 1.8),
+        (4.0, 1.0),
+    )),
+    ("Carbono", (
+        (2.0, 2.7),
+        (3.0, 1.5),
+        (3.75, 1.2),
+        (4.75, 0.8),
+    )),
+)
+
+# Layout SoA (uma coluna por campo) para calcular os tempos vetorizados
+CUT_MATERIALS = [m for m, table in CUT_SPEED for _ in table]
+CUT_THICKNESS = np.array([t for _, table in CUT_SPEED for t, _ in table])
+CUT_SPEEDS = np.array([s for _, table in CUT_SPEED for _, s in table])
+
+# -----------------------------
+# Cache por usuário (kernel C e resultados .npz)
+# -----------------------------
+def _user_cache_dir():
+    """Diretório de cache do próprio usuário (nunca o /tmp compartilhado)."""
+    d = os.path.join(
+        os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+        "nesting_budget")
+    os.makedirs(d, mode=0o700, exist_ok=True)
+    return d
+
+# -----------------------------
+# ctypes (opcional): kernel C p/ soma de hypot por segmento
+# -----------------------------
+def _load_cutlen():
+    """Compila/carrega _cutlen.so; retorna None se não houver compilador.
+
+    A .so fica em um cache por usuário (nunca em caminho compartilhado
+    como /tmp, onde outro usuário local poderia plantar ou trocar a
+    biblioteca — e dois usuários colidiriam no mesmo arquivo). A publicação
+    é atômica via mkstemp + os.replace e, antes do CDLL, conferimos que o
+    arquivo pertence ao próprio usuário.
+    """
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_cutlen.c")
+    try:
+        cache_dir = _user_cache_dir()
+        lib_path = os.path.join(cache_dir, "_cutlen.so")
+        if (not os.path.exists(lib_path)
+                or os.path.getmtime(lib_path) < os.path.getmtime(src)):
+            fd, tmp_path = tempfile.mkstemp(suffix=".so", dir=cache_dir)
+            os.close(fd)
+            try:
+                subprocess.run(["cc", "-O3", "-ffast-math", "-shared", "-fPIC",
+                                "-o", tmp_path, src],
+                               check=True, capture_output=True)
+                os.replace(tmp_path, lib_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        if hasattr(os, "getuid") and os.stat(lib_path).st_uid != os.getuid():
+            return None
+        lib = ctypes.CDLL(lib_path)
+        lib.sum_hypot.argtypes = [ctypes.POINTER(ctypes.c_double), ctypes.c_size_t]
+        lib.sum_hypot.restype = ctypes.c_double
+        return lib
+    except Exception:
+        return None
+
+_CUTLEN = _load_cutlen()
+
+# -----------------------------
+# Numba (opcional): kernel nativo p/ comprimento + dedup
+# -----------------------------
+try:
+    from numba import njit, types
+    from numba.typed import Dict
+    HAVE_NUMBA = True
+except Exception:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    _SEEN_KEY_TYPE = types.UniTuple(types.int64, 4)
+
+    def _new_seen_dict():
+        return Dict.empty(key_type=_SEEN_KEY_TYPE, value_type=types.int8)
+
+    @njit(cache=True)
+    def _sum_len_dedup_numba(pts, eps, seen):
+        """Uma passada: quantiza, canoniza, dedupe e soma hypot por segmento."""
+        total = 0.0
+        inv = 1.0 / eps
+        for i in range(pts.shape[0] - 1):
+            ax = round(pts[i, 0] * inv)
+            ay = round(pts[i, 1] * inv)
+            bx = round(pts[i + 1, 0] * inv)
+            by = round(pts[i + 1, 1] * inv)
+            if (ax > bx) or (ax == bx and ay > by):
+                ax, ay, bx, by = bx, by, ax, ay
+            key = (ax, ay, bx, by)
+            if key in seen:
+                continue
+            seen[key] = np.int8(1)
+            dx = pts[i + 1, 0] - pts[i, 0]
+            dy = pts[i + 1, 1] - pts[i, 1]
+            total += (dx * dx + dy * dy) ** 0.5
+        return total
 
 # -----------------------------
 # Geometria
 # -----------------------------
 SKIP_TYPES = frozenset({"TEXT", "MTEXT", "DIMENSION"})
 
-def iter_paths(msp):
+# Tipos que contribuem para o corte (filtrados já na leitura streaming)
+CUT_ENTITY_TYPES = ("LINE", "ARC", "CIRCLE", "ELLIPSE",
+                    "LWPOLYLINE", "POLYLINE", "SPLINE")
+
+def _flat_to_array(sub, tol):
+    """Achata o subcaminho direto em um buffer NumPy, sem tupla por vértice."""
+    cap = 64
+    buf = np.empty((cap, 2), dtype=np.float64)
+    n = 0
+    for v in sub.flattening(tol):
+        if n == cap:
+            cap *= 2
+            grown = np.empty((cap, 2), dtype=np.float64)
+            grown[:n] = buf
+            buf = grown
+        buf[n, 0] = v.x
+        buf[n, 1] = v.y
+        n += 1
+    return buf[:n]
+
+def _entity_polylines(e, tol):
+    """Polilinhas achatadas de uma entidade: arrays (N,2) float64, N >= 2."""
+    try:
+        p = make_path(e)
+    except Exception:
+        return []
+    subs = []
+    for sub in p.sub_paths():
+        if sub.has_curves:
+            pts = _flat_to_array(sub, tol)
+        else:
+            # Só retas: os vértices de controle já são a polilinha final
+            pts = np.array([(v.x, v.y) for v in sub.control_vertices()],
+                           dtype=np.float64)
+        if len(pts) >= 2:
+            subs.append(pts)
+    return subs
+
+def _entity_length_analytic(e):
+    """Comprimento em forma fechada p/ tipos comuns; None quando não se aplica."""
+    t = e.dxftype()
+    if t == "CIRCLE":
+        return 2.0 * np.pi * e.dxf.radius, 1
+    if t == "ARC":
+        sweep = (e.dxf.end_angle - e.dxf.start_angle) % 360.0
+        return e.dxf.radius * np.radians(sweep), 1
+    if t == "LWPOLYLINE":
+        p = np.array(e.get_points("xyb"), dtype=np.float64)
+        xy = p[:, :2]
+        bulge = p[:, 2]
+        if e.closed:
+            xy = np.vstack([xy, xy[:1]])
+        else:
+            bulge = bulge[:-1]
+        if xy.shape[0] < 2:
+            return 0.0, 0
+        d = np.diff(xy, axis=0)
+        chord = np.hypot(d[:, 0], d[:, 1])
+        # Arco de bulge b: theta = 4*atan(|b|); comprimento = chord*theta/(2*sin(theta/2))
+        theta = 4.0 * np.arctan(np.abs(bulge))
+        denom = 2.0 * np.sin(theta / 2.0)
+        arclen = np.where(theta > 1e-12,
+                          chord * theta / np.where(denom > 0.0, denom, 1.0),
+                          chord)
+        return float(arclen.sum()), 1
+    return None
+
+def _entity_length(e, tol):
+    """(comprimento, n subcaminhos) de uma entidade, analítico quando possível."""
+    res = _entity_length_analytic(e)
+    if res is not None:
+        return res
+    subs = _entity_polylines(e, tol)
+    return length_of_polylines(subs), len(subs)
+
+def flatten_msp(msp, tol=0.3):
+    """Percorre o modelspace uma única vez e produz, por entidade, a lista
+    de polilinhas achatadas: arrays (N,2) float64 com N >= 2."""
+    skip = SKIP_TYPES  # local evita lookup global por entidade
     for e in msp:
-        if e.dxftype() in SKIP_TYPES:
-            continue
-        try:
-            yield make_path(e)
-        except Exception:
+        if e.dxftype() in skip:
             continue
+        subs = _entity_polylines(e, tol)
+        if subs:
+            yield subs
 
-def length_of_path_flattened(path, tol=0.3):
+def length_of_polylines(subs):
+    """Comprimento total de uma lista de polilinhas (N,2)."""
     total = 0.0
-    for sub in path.sub_paths():
-        pts = [(v.x, v.y) for v in sub.flattening(tol)]
-        if len(pts) < 2:
-            continue
-        for (x1, y1), (x2, y2) in zip(pts, pts[1:]):
-            total += math.hypot(x2 - x1, y2 - y1)
+    if _CUTLEN is not None:
+        c_double_p = ctypes.POINTER(ctypes.c_double)
+        for pts in subs:
+            pts = np.ascontiguousarray(pts)
+            total += _CUTLEN.sum_hypot(pts.ctypes.data_as(c_double_p), pts.shape[0])
+        return total
+    for pts in subs:
+        # Comprimento de todos os segmentos de uma vez (vetorizado)
+        d = np.diff(pts, axis=0)
+        total += float(np.sqrt(np.einsum("ij,ij->i", d, d)).sum())
     return total
 
-def rounded(val: float, eps: float) -> float:
-    return val if eps <= 0 else round(val / eps) * eps
+def quantized_segment_keys(pts, eps: float):
+    """Chave canônica (4x int64) por segmento da polilinha pts (N,2)."""
+    # eps <= 0: usa o padrão de bits do float (dedup apenas de segmentos exatos)
+    q = np.round(pts / eps).astype(np.int64) if eps > 0 else pts.view(np.int64)
+    a, b = q[:-1], q[1:]
+    # Ordena os endpoints de cada segmento (mesma ordem lexicográfica das tuplas)
+    swap = (a[:, 0] > b[:, 0]) | ((a[:, 0] == b[:, 0]) & (a[:, 1] > b[:, 1]))
+    lo = np.where(swap[:, None], b, a)
+    hi = np.where(swap[:, None], a, b)
+    return np.concatenate([lo, hi], axis=1)
 
-def segment_key(p1, p2, eps: float):
-    x1, y1 = rounded(p1[0], eps), rounded(p1[1], eps)
-    x2, y2 = rounded(p2[0], eps), rounded(p2[1], eps)
-    a, b = (x1, y1), (x2, y2)
-    return (a, b) if a <= b else (b, a)
+def length_of_polylines_dedup(subs, eps=0.05):
+    """Idem length_of_polylines, com dedup aproximada de segmentos."""
+    if HAVE_NUMBA and eps > 0:
+        seen = _new_seen_dict()
+        return sum(_sum_len_dedup_numba(pts, eps, seen) for pts in subs)
+    seg_keys = []
+    seg_lens = []
+    for pts in subs:
+        d = np.diff(pts, axis=0)
+        seg_lens.append(np.sqrt(np.einsum("ij,ij->i", d, d)))
+        seg_keys.append(quantized_segment_keys(pts, eps))
+    if not seg_keys:
+        return 0.0
+    # Empacota os 4 int64 de cada segmento em um único registro e dedup via unique
+    keys = np.ascontiguousarray(np.concatenate(seg_keys, axis=0))
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * 4)))
+    _, first = np.unique(keys, return_index=True)
+    return float(np.concatenate(seg_lens)[first].sum())
 
-def length_of_path_flattened_dedup(path, tol=0.3, eps=0.05):
-    seen = set()
+# -----------------------------
+# Paralelismo por entidade
+# -----------------------------
+PARALLEL_MIN_BYTES = 4_000_000  # abaixo disso o custo do pool não compensa
+
+def _length_slice_worker(dxf_path, tol, stride, offset):
+    """Soma (comprimento, subcaminhos) das entidades com índice % stride == offset."""
     total = 0.0
-    for sub in path.sub_paths():
-        pts = [(v.x, v.y) for v in sub.flattening(tol)]
-        if len(pts) < 2:
+    n_sub = 0
+    skip = SKIP_TYPES
+    for i, e in enumerate(iterdxf.modelspace(dxf_path, types=CUT_ENTITY_TYPES)):
+        if i % stride != offset or e.dxftype() in skip:
             continue
-        for p1, p2 in zip(pts, pts[1:]):
-            key = segment_key(p1, p2, eps)
-            if key in seen:
-                continue
-            seen.add(key)
-            total += math.hypot(p2[0] - p1[0], p2[1] - p1[1])
-    return total
+        L, n = _entity_length(e, tol)
+        total += L
+        n_sub += n
+    return total, n_sub
 
 # -----------------------------
 # Unidades
@@ -109,18 +313,64 @@ def main():
     ap.add_argument("--decimals", type=int, default=3, help="Casas decimais para minutos")
     args = ap.parse_args()
 
-    # Leitura DXF e soma de comprimentos
-    doc = ezdxf.readfile(args.infile)
-    msp = doc.modelspace()
+    # Cache em disco (no diretório por usuário, como a _cutlen.so — nunca
+    # no /tmp compartilhado): reexecuções sobre o mesmo DXF (p.ex. só
+    # trocando a tabela de velocidades) pulam parsing + flattening.
+    with open(args.infile, "rb") as f:
+        h = hashlib.sha256(f.read()).hexdigest()[:16]
+    cache_path = os.path.join(
+        _user_cache_dir(),
+        f"dxfcut_{h}_tol{args.tol}_d{int(args.dedup)}_e{args.eps}.npz")
+
+    total_len_model = None
+    if os.path.exists(cache_path):
+        try:
+            cached = np.load(cache_path)
+            total_len_model = float(cached["L"])
+            total_subpaths = int(cached["n"])
+        except Exception:
+            total_len_model = None  # .npz truncado/corrompido: recalcula
 
-    total_len_model = 0.0
-    total_subpaths = 0
-    for path in iter_paths(msp):
-        L = (length_of_path_flattened_dedup(path, tol=args.tol, eps=args.eps)
-             if args.dedup else
-             length_of_path_flattened(path, tol=args.tol))
-        total_len_model += L
-        total_subpaths += len(list(path.sub_paths()))
+    if total_len_model is None:
+        total_len_model = 0.0
+        total_subpaths = 0
+
+        # Arquivos grandes sem dedup: divide as entidades entre processos
+        parallel = (not args.dedup) and os.path.getsize(args.infile) >= PARALLEL_MIN_BYTES
+        if parallel:
+            try:
+                stride = os.cpu_count() or 2
+                with ProcessPoolExecutor(max_workers=stride) as ex:
+                    futs = [ex.submit(_length_slice_worker, args.infile, args.tol, stride, k)
+                            for k in range(stride)]
+                    for f in as_completed(futs):
+                        L, n = f.result()
+                        total_len_model += L
+                        total_subpaths += n
+            except Exception:
+                # Fallback sequencial
+                parallel = False
+                total_len_model = 0.0
+                total_subpaths = 0
+
+        if not parallel:
+            # Leitura DXF em streaming: itera o modelspace sem montar o DOM inteiro
+            msp = iterdxf.modelspace(args.infile, types=CUT_ENTITY_TYPES)
+            if args.dedup:
+                # Dedup global: segmento repetido entre entidades conta uma vez só
+                all_subs = []
+                for subs in flatten_msp(msp, tol=args.tol):
+                    all_subs.extend(subs)
+                    total_subpaths += len(subs)
+                total_len_model = length_of_polylines_dedup(all_subs, eps=args.eps)
+            else:
+                for e in msp:
+                    if e.dxftype() in SKIP_TYPES:
+                        continue
+                    L, n = _entity_length(e, args.tol)
+                    total_len_model += L
+                    total_subpaths += n
+        np.savez(cache_path, L=total_len_model, n=total_subpaths)
 
     # Para metros
     total_len_m = total_len_model * UNIT_FACTORS_TO_M[args.units]
@@ -137,30 +387,35 @@ def main():
     print("-" * 70)
     print(f"{'Material':8s}  {'Esp(mm)':7s}  {'Vel(m/min)':10s}  {'Tempo_min(abs)':>15s}")
 
-    rows = []
-    for material, table in CUT_SPEED.items():
-        for thickness, speed in sorted(table.items()):
-            time_min = (total_len_m / speed) if speed > 0 else float("inf")
-            if args.estimate_pierces and args.pierce_time > 0.0:
-                time_min += (total_subpaths * args.pierce_time) / 60.0
-            time_min = round(time_min, args.decimals)
-            rows.append({
-                "Material": material,
-                "Espessura_mm": thickness,
-                "Velocidade_m_min": speed,
-                "Tempo_min": time_min,
-                "Comprimento_m": round(total_len_m, 5),
-                "Pierces_est": total_subpaths if (args.estimate_pierces and args.pierce_time > 0.0) else 0,
-            })
-            print(f"{material:8s}  {thickness:7.2f}  {speed:10.2f}  {time_min:15.{args.decimals}f}")
+    # Todos os tempos de uma vez (vetorizado sobre a tabela SoA)
+    times = np.divide(total_len_m, CUT_SPEEDS,
+                      out=np.full_like(CUT_SPEEDS, np.inf),
+                      where=CUT_SPEEDS > 0)
+    use_pierces = args.estimate_pierces and args.pierce_time > 0.0
+    if use_pierces:
+        times = times + (total_subpaths * args.pierce_time) / 60.0
+    times = np.round(times, args.decimals)
+
+    # Emite cada linha (stdout e CSV) assim que calculada, sem lista intermediária
+    pierces = total_subpaths if use_pierces else 0
+    csv_file = None
+    if args.csv:
+        # Template especializado: campos e tipos conhecidos, dispensa csv.DictWriter
+        fmt = "{m},{t},{s},{tm:.%df},{L:.5f},{p}\n" % args.decimals
+        csv_file = open(args.csv, "w", encoding="utf-8")
+        csv_file.write("Material,Espessura_mm,Velocidade_m_min,Tempo_min,Comprimento_m,Pierces_est\n")
+
+    for material, thickness, speed, time_min in zip(CUT_MATERIALS, CUT_THICKNESS, CUT_SPEEDS, times):
+        print(f"{material:8s}  {thickness:7.2f}  {speed:10.2f}  {time_min:15.{args.decimals}f}")
+        if csv_file is not None:
+            csv_file.write(fmt.format(m=material, t=thickness, s=speed,
+                                      tm=time_min, L=round(total_len_m, 5),
+                                      p=pierces))
 
     print("=" * 70)
 
-    if args.csv and rows:
-        with open(args.csv, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            w.writeheader()
-            w.writerows(rows)
+    if csv_file is not None:
+        csv_file.close()
         print(f"CSV salvo em: {args.csv}")
 
 if __name__ == "__main__":
@@ -4,18 +4,21 @@ Sistema Automático de Nesting + Preços
 Calcula automaticamente nesting e preços para Inox e Carbono
 """
 
+import ctypes
 import json
 import math
 import os
-import re
+import queue
 import subprocess
 import threading
-from tkinter import Tk, StringVar, DoubleVar, N, S, E, W, filedialog, messagebox
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
+from tkinter import Tk, BooleanVar, StringVar, DoubleVar, N, S, E, W, filedialog, messagebox
 from tkinter import ttk
 from tkinterdnd2 import DND_FILES, TkinterDnD
 
-import ezdxf
-from ezdxf.path import make_path
+import numpy as np
 
 # -----------------------------
 # CONFIGURAÇÕES PADRÃO
@@ -53,69 +56,188 @@ DEFAULT_CONFIG = {
     },
     "minute_price": 3.37,
     "coefficient": 0.95,
+    # Tolerância (mm) do flattening no cálculo de comprimento: 1.0 gera bem
+    # menos segmentos que 0.3 com erro sub-% no total
+    "length_tol": 1.0,
 }
 
+# Numba (opcional): kernel nativo p/ soma de comprimento por subcaminho
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except Exception:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _poly_len(xy):
+        s = 0.0
+        for i in range(xy.shape[0] - 1):
+            dx = xy[i + 1, 0] - xy[i, 0]
+            dy = xy[i + 1, 1] - xy[i, 1]
+            s += (dx * dx + dy * dy) ** 0.5
+        return s
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _total_len_soa(xs, ys, offsets):
+        """Soma multi-thread: um prange por subcaminho sobre o layout SoA"""
+        s = 0.0
+        for k in prange(offsets.shape[0] - 1):
+            local = 0.0
+            for i in range(offsets[k], offsets[k + 1] - 1):
+                dx = xs[i + 1] - xs[i]
+                dy = ys[i + 1] - ys[i]
+                local += (dx * dx + dy * dy) ** 0.5
+            s += local
+        return s
+
 CONFIG_FILE = "nesting_config.json"
-FINAL_REGEX = re.compile(r"FINAL:\s*(\d+)\s*pe", re.IGNORECASE)
+NEST_CACHE_FILE = ".nest_cache.json"
 SKIP_TYPES = frozenset({"TEXT", "MTEXT", "DIMENSION"})
 
+def _parse_final(line: bytes):
+    """Extrai o N de uma linha b'... FINAL: N pe\\xc3\\xa7as'; None se ausente.
+
+    find/split em bytes (memchr) em vez de regex: a linha tem formato fixo.
+    """
+    i = line.find(b"FINAL:")
+    if i < 0:
+        return None
+    try:
+        return int(line[i + 6:].split(None, 1)[0])
+    except (IndexError, ValueError):
+        return None
+
 # -----------------------------
 # Funções auxiliares
 # -----------------------------
 
-def iter_paths(msp):
-    for e in msp:
-        if e.dxftype() in SKIP_TYPES:
-            continue
+def entity_length_analytic(e):
+    """Comprimento exato p/ tipos simples; None quando precisa de flattening."""
+    t = e.dxftype()
+    if t == "LINE":
+        s, p = e.dxf.start, e.dxf.end
+        return math.hypot(p.x - s.x, p.y - s.y)
+    if t == "CIRCLE":
+        return 2.0 * math.pi * e.dxf.radius
+    if t == "ARC":
+        return e.dxf.radius * math.radians((e.dxf.end_angle - e.dxf.start_angle) % 360.0)
+    if t == "LWPOLYLINE":
+        pts = np.array(e.get_points("xyb"), dtype=np.float64)
+        xy = pts[:, :2]
+        bulge = pts[:, 2]
+        if e.closed:
+            xy = np.vstack([xy, xy[:1]])
+        else:
+            bulge = bulge[:-1]
+        if xy.shape[0] < 2:
+            return 0.0
+        d = np.diff(xy, axis=0)
+        chord = np.hypot(d[:, 0], d[:, 1])
+        # Arco de bulge b: theta = 4*atan(|b|); comprimento = chord*theta/(2*sin(theta/2))
+        theta = 4.0 * np.arctan(np.abs(bulge))
+        denom = 2.0 * np.sin(theta / 2.0)
+        arclen = np.where(theta > 1e-12,
+                          chord * theta / np.where(denom > 0.0, denom, 1.0),
+                          chord)
+        return float(arclen.sum())
+    return None
+
+# Kernel C compartilhado com dxf_cut_time (_cutlen.c, compilado em runtime):
+# alternativa ao Numba sem custo de warmup do JIT. False = ainda não tentado.
+_CUTLEN = False
+_C_DOUBLE_P = ctypes.POINTER(ctypes.c_double)
+
+def _get_cutlen():
+    global _CUTLEN
+    if _CUTLEN is False:
         try:
-            yield make_path(e)
+            from dxf_cut_time import _CUTLEN as lib
         except Exception:
-            continue
+            lib = None
+        _CUTLEN = lib
+    return _CUTLEN
+
+def _flat_coords(sub, tol):
+    """Gera x0, y0, x1, y1, ... do flattening sem tupla por vértice"""
+    for v in sub.flattening(tol):
+        yield v.x
+        yield v.y
+
+def _paths_to_soa(paths, tol):
+    """Achata todos os subcaminhos em xs/ys concatenados + offsets de fronteira"""
+    xs, ys = [], []
+    offsets = [0]
+    for p in paths:
+        for sub in p.sub_paths():
+            for v in sub.flattening(tol):
+                xs.append(v.x)
+                ys.append(v.y)
+            offsets.append(len(xs))
+    return (np.array(xs, dtype=np.float64),
+            np.array(ys, dtype=np.float64),
+            np.array(offsets, dtype=np.int64))
 
 def length_of_path_flattened(path, tol=0.3):
     total = 0.0
     for sub in path.sub_paths():
-        pts = [(v.x, v.y) for v in sub.flattening(tol)]
+        # fromiter sobre o gerador plano: zero tuplas intermediárias
+        pts = np.fromiter(_flat_coords(sub, tol), dtype=np.float64).reshape(-1, 2)
         if len(pts) < 2:
             continue
-        for (x1, y1), (x2, y2) in zip(pts, pts[1:]):
-            total += math.hypot(x2 - x1, y2 - y1)
-    return total
+        lib = _get_cutlen()
+        if lib is not None:
+            total += lib.sum_hypot(pts.ctypes.data_as(_C_DOUBLE_P), pts.shape[0])
+        elif HAVE_NUMBA:
+            total += _poly_len(pts)
+        else:
+            # Soma todos os segmentos do subcaminho em uma passada C
+            d = np.diff(pts, axis=0)
+            total += np.sqrt((d * d).sum(axis=1)).sum()
+    return float(total)
 
 def convert_keys_to_float(d):
-    """Converte chaves string para float recursivamente"""
-    if not isinstance(d, dict):
-        return d
-    
-    new_dict = {}
-    for k, v in d.items():
-        try:
-            new_key = float(k)
-        except (ValueError, TypeError):
-            new_key = k
-        
-        if isinstance(v, dict):
-            new_dict[new_key] = convert_keys_to_float(v)
-        else:
-            new_dict[new_key] = v
-    
-    return new_dict
+    """Converte chaves de espessura (string no json) para float.
+
+    O esquema é fixo: material -> {espessura: valor}; dois loops explícitos
+    em vez de recursão com isinstance/try por chave.
+    """
+    return {mat: {float(k): v for k, v in sub.items()}
+            for mat, sub in d.items()}
+
+def _copy_config(cfg):
+    """Cópia profunda de um dict de config sem o round-trip por json"""
+    return {
+        k: ({kk: (vv.copy() if isinstance(vv, dict) else vv) for kk, vv in v.items()}
+            if isinstance(v, dict) else v)
+        for k, v in cfg.items()
+    }
+
+def default_config():
+    return _copy_config(DEFAULT_CONFIG)
+
+@lru_cache(maxsize=1)
+def _load_config_file(mtime_ns):
+    """Parse do arquivo de config; cacheado pelo mtime (muda -> recarrega)"""
+    with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+        config = json.load(f)
+        if "sheet_sizes" not in config:
+            config["sheet_sizes"] = DEFAULT_CONFIG["sheet_sizes"].copy()
+        if "length_tol" not in config:
+            config["length_tol"] = DEFAULT_CONFIG["length_tol"]
+
+        config["sheet_prices"] = convert_keys_to_float(config.get("sheet_prices", {}))
+        config["cut_speed"] = convert_keys_to_float(config.get("cut_speed", {}))
+
+        return config
 
 def load_config():
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                if "sheet_sizes" not in config:
-                    config["sheet_sizes"] = DEFAULT_CONFIG["sheet_sizes"].copy()
-                
-                config["sheet_prices"] = convert_keys_to_float(config.get("sheet_prices", {}))
-                config["cut_speed"] = convert_keys_to_float(config.get("cut_speed", {}))
-                
-                return config
-        except:
-            pass
-    return json.loads(json.dumps(DEFAULT_CONFIG))
+    try:
+        mtime_ns = os.stat(CONFIG_FILE).st_mtime_ns
+        # Cópia defensiva: edições na UI não podem corromper o dict cacheado
+        return _copy_config(_load_config_file(mtime_ns))
+    except:
+        return default_config()
 
 def save_config(config):
     try:
@@ -140,76 +262,261 @@ def run_nesting_and_get_qty(infile: str, w: float, h: float,
     env = os.environ.copy()
     env['PYTHONIOENCODING'] = 'utf-8'
 
-    proc = subprocess.run(
-        cmd_parts,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding='utf-8',
-        errors='replace',
-        env=env,
-        check=False
-    )
-    
-    if proc.returncode != 0:
-        raise RuntimeError(
-            f"Erro no nesting.\nCMD: {' '.join(cmd_parts)}\n"
-            f"STDOUT:\n{proc.stdout}\nSTDERR:\n{proc.stderr}"
+    # 1a tentativa enxuta: stderr descartado, só o stdout interessa p/ o
+    # FINAL. Falhou? Roda de novo com stderr capturado p/ o diagnóstico.
+    for stderr_dst in (subprocess.DEVNULL, subprocess.STDOUT):
+        # Streaming: varre linha a linha e encerra assim que o FINAL aparece,
+        # sem acumular a saída inteira do subprocesso em memória
+        proc = subprocess.Popen(
+            cmd_parts,
+            stdout=subprocess.PIPE,
+            stderr=stderr_dst,
+            env=env,
         )
+        tail = deque(maxlen=40)  # contexto p/ mensagem de erro
+        qty = None
+        for line in proc.stdout:
+            tail.append(line)
+            qty = _parse_final(line)
+            if qty is not None:
+                break
 
-    full_output = proc.stdout + "\n" + proc.stderr
-    m = FINAL_REGEX.search(full_output)
-    
-    if not m:
+        if qty is not None:
+            proc.stdout.close()
+            proc.terminate()
+            proc.wait()
+            return qty
+
+        proc.wait()
+
+    tail_text = b"".join(tail)[-1000:].decode('utf-8', 'replace')
+    if proc.returncode != 0:
         raise RuntimeError(
-            f"Não foi possível extrair a quantidade.\nSaída:\n{full_output[-1000:]}"
+            f"Erro no nesting.\nCMD: {' '.join(cmd_parts)}\nSaída:\n{tail_text}"
         )
-    return int(m.group(1))
+    raise RuntimeError(
+        f"Não foi possível extrair a quantidade.\nSaída:\n{tail_text}"
+    )
+
+def load_nest_cache():
+    """Cache persistente (arquivo+config) -> (qty_inox, qty_carbono, comprimento)"""
+    try:
+        with open(NEST_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_nest_cache(cache):
+    try:
+        with open(NEST_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except Exception:
+        pass
+
+class NestWorker:
+    """Processo `nest.py --serve` persistente.
+
+    Paga o custo de interpretador + imports uma única vez; cada nesting
+    vira uma linha JSON no stdin e a leitura do stdout até o `FINAL:`.
+    Se o worker morrer (ou não suportar --serve), cai no subprocesso
+    avulso por chamada.
+    """
+
+    def __init__(self):
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def _ensure_proc(self):
+        if self.proc is None or self.proc.poll() is not None:
+            env = os.environ.copy()
+            env['PYTHONIOENCODING'] = 'utf-8'
+            self.proc = subprocess.Popen(
+                ["python", "nest.py", "--serve"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=env,
+            )
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.terminate()
+            except Exception:
+                pass
+        self.proc = None
+
+    def run(self, infile: str, w: float, h: float,
+            margin: float = 0.1, tol: float = 0.5, snap: float = 2.0,
+            out_dir: str = "outputs_nesting") -> int:
+        try:
+            with self.lock:
+                self._ensure_proc()
+                job = json.dumps({"in": infile, "w": w, "h": h, "margin": margin,
+                                  "tol": tol, "snap": snap, "out": out_dir})
+                self.proc.stdin.write(job.encode('utf-8') + b"\n")
+                self.proc.stdin.flush()
+                for line in self.proc.stdout:
+                    qty = _parse_final(line)
+                    if qty is not None:
+                        return qty
+                    if line.startswith(b"ERRO:"):
+                        raise RuntimeError(
+                            f"Erro no nesting.\n{line.decode('utf-8', 'replace').strip()}")
+                raise BrokenPipeError("worker nest.py terminou sem resultado")
+        except (BrokenPipeError, OSError, ValueError):
+            # Worker indisponível: subprocesso avulso por chamada, com o
+            # mesmo parse em streaming do FINAL (isolamento de processo
+            # preservado — um DXF problemático não derruba a GUI)
+            self.stop()
+            return run_nesting_and_get_qty(infile, w, h, margin=margin,
+                                           tol=tol, snap=snap, out_dir=out_dir)
+
+# Cache em memória: (abspath, mtime_ns, tamanho, tol) -> comprimento em metros
+_LEN_CACHE = {}
+
+# Abaixo disso o custo de criar o pool supera o ganho
+PARALLEL_MIN_PATHS = 200
 
 def compute_length_m(infile: str, tol: float = 0.3) -> float:
-    doc = ezdxf.readfile(infile)
-    msp = doc.modelspace()
+    # Import tardio: ezdxf custa centenas de ms e a janela Tk não precisa
+    # dele p/ abrir; o custo só é pago no primeiro cálculo
+    from ezdxf.addons import iterdxf
+    from ezdxf.path import make_path
 
-    total_len_model = 0.0
-    for path in iter_paths(msp):
-        total_len_model += length_of_path_flattened(path, tol=tol)
+    st = os.stat(infile)
+    key = (os.path.abspath(infile), st.st_mtime_ns, st.st_size, tol)
+    cached = _LEN_CACHE.get(key)
+    if cached is not None:
+        return cached
 
-    return total_len_model * 0.001
+    # Streaming: itera o modelspace entidade a entidade, sem DOM completo.
+    # Tipos simples somam direto em forma fechada; só o resto vai p/ flattening.
+    analytic_len = 0.0
+    paths = []
+    bad_types = set()  # tipos em que make_path já falhou: pula sem try
+    doc = iterdxf.opendxf(infile)
+    try:
+        for e in doc.modelspace():
+            t = e.dxftype()
+            if t in SKIP_TYPES or t in bad_types:
+                continue
+            L = entity_length_analytic(e)
+            if L is not None:
+                analytic_len += L
+            else:
+                try:
+                    paths.append(make_path(e))
+                except Exception:
+                    # O(tipos que falham) exceções em vez de O(entidades)
+                    bad_types.add(t)
+                    continue
+    finally:
+        doc.close()
 
-def compute_times_and_prices(total_len_m: float, qty: int, config: dict, material_filter: str = None):
-    rows = []
+    total_len_model = None
+    if len(paths) >= PARALLEL_MIN_PATHS:
+        # Flattening é independente por entidade: divide entre processos
+        try:
+            with ProcessPoolExecutor() as ex:
+                total_len_model = sum(ex.map(
+                    partial(length_of_path_flattened, tol=tol),
+                    paths, chunksize=32))
+        except Exception:
+            total_len_model = None  # Fallback sequencial
+    if total_len_model is None:
+        if HAVE_NUMBA and paths:
+            # Reduz sobre o SoA concatenado com threads (prange), sem GIL
+            xs, ys, offsets = _paths_to_soa(paths, tol)
+            total_len_model = float(_total_len_soa(xs, ys, offsets))
+        else:
+            total_len_model = sum(length_of_path_flattened(p, tol=tol) for p in paths)
+
+    total_len_m = (analytic_len + total_len_model) * 0.001
+    _LEN_CACHE[key] = total_len_m
+    return total_len_m
+
+def material_arrays(config: dict) -> dict:
+    """Colunas SoA (espessuras, velocidades, preços) por material.
+
+    Construídas uma vez por mudança de config; o cálculo de tempos/preços
+    vira só ufuncs sobre esses arrays.
+    """
     sheet_prices = config["sheet_prices"]
-    cut_speed = config["cut_speed"]
+    out = {}
+    for material, d in config["cut_speed"].items():
+        thicknesses = sorted(d.keys())
+        speeds = np.array([d[t] for t in thicknesses])
+        prices = np.array([sheet_prices.get(material, {}).get(t, 0.0)
+                           for t in thicknesses])
+        out[material] = (thicknesses, speeds, prices)
+    return out
+
+# Linha da tabela de resultados: tupla nomeada em vez de dict por linha
+# (acesso por atributo/índice, sem hash de 8 chaves string por leitura)
+Row = namedtuple("Row", (
+    "material", "thickness", "speed", "min_per_piece",
+    "qty", "min_total", "unit_price", "sheet_price",
+    "display",  # strings prontas p/ o Treeview, formatadas fora da thread do Tk
+))
+
+def make_price_computers(config: dict, mat_arrays: dict = None) -> dict:
+    """Especializa o cálculo de tempos/preços por material (avaliação parcial).
+
+    Arrays, máscaras e constantes da config ficam presos na closure; cada
+    chamada vira só a aritmética vetorizada, sem lookups nem sort.
+    """
+    if mat_arrays is None:
+        mat_arrays = material_arrays(config)
     minute_price = config["minute_price"]
     coefficient = config["coefficient"]
-    
-    qty_coef = qty * coefficient
-    
-    for material in cut_speed.keys():
+
+    def _make(material, cols):
+        thicknesses, speeds, prices = cols
+        # Sem branch e sem inf: divide por velocidade "segura" e zera as
+        # linhas inválidas depois (inf mispropagaria até o formatador da UI)
+        mask = speeds > 0
+        safe_speeds = np.where(mask, speeds, 1.0)
+
+        def compute(total_len_m, qty):
+            qty_coef = qty * coefficient
+            per_piece = total_len_m / safe_speeds
+            per_piece[~mask] = 0.0
+            total_min = per_piece * qty
+
+            valid = mask & (qty_coef > 0) & (qty > 0)
+            unit_price = np.where(
+                valid,
+                prices / (qty_coef if qty_coef > 0 else 1.0)
+                + minute_price * total_min / (qty if qty > 0 else 1),
+                0.0)
+
+            per_piece = np.round(per_piece, 3)
+            total_min = np.round(total_min, 3)
+            unit_price = np.round(unit_price, 2)
+
+            return [
+                Row(material, thickness, speed, pp, qty, tm, up, price,
+                    (material, f'{thickness:.2f}', f'{speed:.2f}', f'{pp:.3f}',
+                     str(qty), f'{tm:.3f}', f'R$ {up:.2f}'))
+                for thickness, speed, pp, tm, up, price in zip(
+                    thicknesses, speeds, per_piece, total_min, unit_price, prices)]
+
+        return compute
+
+    return {material: _make(material, cols)
+            for material, cols in mat_arrays.items()}
+
+def compute_times_and_prices(total_len_m: float, qty: int, config: dict,
+                             material_filter: str = None, computers: dict = None):
+    rows = []
+    if computers is None:
+        computers = make_price_computers(config)
+    for material, compute in computers.items():
         if material_filter and material != material_filter:
             continue
-            
-        for thickness, speed in sorted(cut_speed[material].items()):
-            per_piece_min = total_len_m / speed if speed > 0 else float("inf")
-            total_min = per_piece_min * qty
-            
-            sheet_price = sheet_prices.get(material, {}).get(thickness, 0.0)
-            
-            if qty_coef > 0 and qty > 0:
-                price_per_piece = (sheet_price / qty_coef) + (minute_price * total_min / qty)
-            else:
-                price_per_piece = 0.0
-            
-            rows.append({
-                "Material": material,
-                "Espessura_mm": thickness,
-                "Velocidade_m_min": speed,
-                "Min_por_peca": round(per_piece_min, 3),
-                "Quantidade": qty,
-                "Min_total": round(total_min, 3),
-                "Preco_unitario": round(price_per_piece, 2),
-                "Valor_chapa": sheet_price,
-            })
+        rows.extend(compute(total_len_m, qty))
     return rows
 
 # -----------------------------
@@ -222,7 +529,18 @@ class App:
         self.root.geometry("1000x650")
         
         self.config = load_config()
+        self._compute = make_price_computers(self.config)
         self.dxf_files = []
+        self.result_tabs = {}  # file_name -> (frame, tree): atualização in-place
+        self.nest_cache = load_nest_cache()
+        self._cache_lock = threading.Lock()  # arquivos processados em paralelo
+
+        # Eventos das threads de trabalho: um drain periódico em vez de um
+        # root.after por atualização (N arquivos não afogam o event loop)
+        self._events = queue.Queue()
+
+        # Workers persistentes de nesting (um por material p/ rodar em paralelo)
+        self.nest_workers = {m: NestWorker() for m in ("Inox", "Carbono")}
         
         # Notebook principal
         self.main_notebook = ttk.Notebook(root)
@@ -246,7 +564,26 @@ class App:
         
         # Configura drag and drop
         self._setup_drag_drop()
-    
+
+        self.root.after(50, self._drain_events)
+
+    def _drain_events(self):
+        """Aplica em lote os eventos pendentes das threads de trabalho"""
+        try:
+            while True:
+                kind, payload = self._events.get_nowait()
+                if kind == "status":
+                    self.var_status.set(payload)
+                elif kind == "tab":
+                    self._create_result_tab(*payload)
+                elif kind == "error":
+                    messagebox.showerror("Erro", payload)
+                elif kind == "done":
+                    self.btn_calculate.config(state="normal")
+        except queue.Empty:
+            pass
+        self.root.after(50, self._drain_events)
+
     def _init_controls(self):
         """Inicializa área de controles e status"""
         control_frame = ttk.Frame(self.calc_container)
@@ -278,6 +615,10 @@ class App:
         self.btn_calculate = ttk.Button(btn_frame, text="Calcular Todos", command=self.calculate_all)
         self.btn_calculate.pack(side="left", padx=5)
         self.btn_calculate.config(state="disabled")
+
+        self.var_force_recalc = BooleanVar(value=False)
+        ttk.Checkbutton(btn_frame, text="Forçar recálculo",
+                        variable=self.var_force_recalc).pack(side="left", padx=5)
         
         # Status
         self.var_status = StringVar(value="Aguardando arquivos")
@@ -320,11 +661,12 @@ class App:
     def clear_files(self):
         """Limpa lista de arquivos"""
         self.dxf_files.clear()
-        
+
         # Remove todas as abas de resultados
         for tab in self.results_notebook.tabs():
             self.results_notebook.forget(tab)
-        
+        self.result_tabs.clear()
+
         self.update_file_list()
     
     def update_file_list(self):
@@ -352,110 +694,164 @@ class App:
         
         self.btn_calculate.config(state="disabled")
         self._update_config_from_ui()
-        
-        # Remove abas antigas
-        for tab in self.results_notebook.tabs():
-            self.results_notebook.forget(tab)
-        
+
+        # Variável Tk lida aqui (thread do Tk) e passada como valor; as
+        # threads do pool não tocam em widgets nem em Variables
+        force_recalc = self.var_force_recalc.get()
+
+        # Abas existentes são reaproveitadas: linhas atualizadas no lugar
         # Processa cada arquivo em thread
         threading.Thread(
             target=self._process_all_files,
+            args=(force_recalc,),
             daemon=True
         ).start()
-    
-    def _process_all_files(self):
-        """Processa todos os arquivos DXF"""
-        total = len(self.dxf_files)
-        
-        for idx, dxf_file in enumerate(self.dxf_files, 1):
-            file_name = os.path.basename(dxf_file)
-            
-            self.root.after(0, lambda: self.var_status.set(
-                f"Processando {idx}/{total}: {file_name}..."
-            ))
-            
-            try:
-                # Calcula comprimento
-                total_len_m = compute_length_m(dxf_file, tol=0.3)
-                
-                all_rows = []
-                
-                # Processa cada material
+
+    def _process_one_file(self, dxf_file, idx, force_recalc=False):
+        """Pipeline completo de um arquivo; retorna as linhas da tabela"""
+        # Chave do cache: identidade do arquivo + inputs do nesting
+        st = os.stat(dxf_file)
+        sizes = self.config["sheet_sizes"]
+        cache_key = "|".join([
+            os.path.abspath(dxf_file),
+            str(st.st_mtime_ns), str(st.st_size),
+            f'{sizes["Inox"]["w"]}x{sizes["Inox"]["h"]}',
+            f'{sizes["Carbono"]["w"]}x{sizes["Carbono"]["h"]}',
+            str(self.config.get("length_tol", 1.0)),
+        ])
+
+        cached = None
+        if not force_recalc:
+            cached = self.nest_cache.get(cache_key)
+
+        if cached is not None:
+            # Arquivo e config inalterados: pula comprimento + nesting
+            qty_by_material = {"Inox": cached[0], "Carbono": cached[1]}
+            total_len_m = cached[2]
+        else:
+            # Calcula comprimento
+            total_len_m = compute_length_m(dxf_file, tol=self.config.get("length_tol", 1.0))
+
+            # Nesting dos dois materiais em paralelo: cada um é um
+            # subprocesso independente, o wall-clock vira max(t1, t2)
+            qty_by_material = {}
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {}
                 for material in ["Inox", "Carbono"]:
                     sheet_size = self.config["sheet_sizes"][material]
-                    w, h = sheet_size["w"], sheet_size["h"]
-                    
-                    qty_material = run_nesting_and_get_qty(
+                    futures[material] = executor.submit(
+                        self.nest_workers[material].run,
                         infile=dxf_file,
-                        w=w, h=h,
+                        w=sheet_size["w"], h=sheet_size["h"],
                         out_dir=f"outputs_nesting_{material.lower()}_{idx}"
                     )
-                    
-                    rows = compute_times_and_prices(
-                        total_len_m=total_len_m,
-                        qty=qty_material,
-                        config=self.config,
-                        material_filter=material
-                    )
-                    
-                    all_rows.extend(rows)
-                
-                # Cria aba com resultados
-                self.root.after(0, self._create_result_tab, file_name, all_rows)
-                
-            except Exception as e:
-                error_msg = f"Erro ao processar {file_name}: {str(e)}"
-                self.root.after(0, lambda msg=error_msg: messagebox.showerror("Erro", msg))
-        
-        self.root.after(0, lambda: self.var_status.set(
-            f"✓ Concluído: {total} arquivo(s) processado(s)"
-        ))
-        self.root.after(0, lambda: self.btn_calculate.config(state="normal"))
+
+                for material in ["Inox", "Carbono"]:
+                    qty_by_material[material] = futures[material].result()
+
+            with self._cache_lock:
+                self.nest_cache[cache_key] = [qty_by_material["Inox"],
+                                              qty_by_material["Carbono"],
+                                              total_len_m]
+                save_nest_cache(self.nest_cache)
+
+        all_rows = []
+        for material in ["Inox", "Carbono"]:
+            rows = compute_times_and_prices(
+                total_len_m=total_len_m,
+                qty=qty_by_material[material],
+                config=self.config,
+                material_filter=material,
+                computers=self._compute
+            )
+
+            all_rows.extend(rows)
+        return all_rows
+
+    def _process_all_files(self, force_recalc=False):
+        """Processa todos os arquivos DXF"""
+        files = list(self.dxf_files)
+        total = len(files)
+        done = 0
+
+        # Arquivos são independentes: roda vários ao mesmo tempo. Metade dos
+        # cores porque cada arquivo já paraleliza por dentro (2 materiais +
+        # pool de comprimento); os workers de nesting serializam por material.
+        max_workers = max(1, min(total, (os.cpu_count() or 2) // 2))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(self._process_one_file, dxf_file, idx,
+                            force_recalc): dxf_file
+                for idx, dxf_file in enumerate(files, 1)
+            }
+            for future in as_completed(futures):
+                file_name = os.path.basename(futures[future])
+                done += 1
+                try:
+                    all_rows = future.result()
+                except Exception as e:
+                    self._events.put(("error", f"Erro ao processar {file_name}: {str(e)}"))
+                else:
+                    # Aba criada no drain, sempre na thread do Tk
+                    self._events.put(("tab", (file_name, all_rows)))
+                self._events.put(("status", f"Processando... {done}/{total} concluído(s)"))
+
+        self._events.put(("status", f"✓ Concluído: {total} arquivo(s) processado(s)"))
+        self._events.put(("done", None))
     
+    def _fill_tree(self, tree, rows):
+        """Preenche a tabela; linhas existentes são atualizadas no lugar"""
+        for idx, r in enumerate(rows):
+            iid = f'{r.material}_{r.thickness}'
+            if tree.exists(iid):
+                tree.item(iid, values=r.display)
+            else:
+                tag = "oddrow" if idx % 2 == 0 else "evenrow"
+                tree.insert("", "end", iid=iid, values=r.display, tags=(tag, "price_highlight"))
+
     def _create_result_tab(self, file_name, rows):
-        """Cria aba com resultados para um arquivo"""
+        """Cria (ou atualiza no lugar) a aba com resultados de um arquivo"""
+        existing = self.result_tabs.get(file_name)
+        if existing is not None:
+            # Recalculo do mesmo arquivo: só troca os valores das células,
+            # sem destruir/recriar widgets
+            tab_frame, tree = existing
+            self._fill_tree(tree, rows)
+            self.results_notebook.select(tab_frame)
+            return
+
         # Frame da aba
         tab_frame = ttk.Frame(self.results_notebook)
         self.results_notebook.add(tab_frame, text=file_name[:25])
-        
+
         # Tabela
         cols = ("Material", "Esp(mm)", "Vel(m/min)", "Min/peça", "Qtd", "Min total", "💰 Preço R$")
         tree = ttk.Treeview(tab_frame, columns=cols, show="headings", height=20)
-        
+
         col_widths = [85, 70, 85, 75, 55, 80, 110]
         for col, width in zip(cols, col_widths):
             tree.heading(col, text=col)
             tree.column(col, width=width, anchor="center")
-        
+
         # Estilo zebra e destaque de preço
         tree.tag_configure("oddrow", background="#f9f9f9")
         tree.tag_configure("evenrow", background="#ffffff")
         tree.tag_configure("price_highlight", foreground="#047857", font=("", 9, "bold"))
-        
-        # Adiciona dados
-        for idx, r in enumerate(rows):
-            tag = "oddrow" if idx % 2 == 0 else "evenrow"
-            values = (
-                r["Material"],
-                f'{r["Espessura_mm"]:.2f}',
-                f'{r["Velocidade_m_min"]:.2f}',
-                f'{r["Min_por_peca"]:.3f}',
-                str(r["Quantidade"]),
-                f'{r["Min_total"]:.3f}',
-                f'R$ {r["Preco_unitario"]:.2f}',
-            )
-            item = tree.insert("", "end", values=values, tags=(tag, "price_highlight"))
-        
+
+        self._fill_tree(tree, rows)
+
         tree.pack(side="left", fill="both", expand=True)
-        
+
         # Scrollbar
         vsb = ttk.Scrollbar(tab_frame, orient="vertical", command=tree.yview)
         tree.configure(yscroll=vsb.set)
         vsb.pack(side="right", fill="y")
-        
+
         # Bind para copiar preço ao clicar
         tree.bind('<Button-1>', lambda e: self._on_tree_click(e, tree))
-        
+
+        self.result_tabs[file_name] = (tab_frame, tree)
+
         # Seleciona a nova aba
         self.results_notebook.select(tab_frame)
     
@@ -492,28 +888,9 @@ class App:
     
     def _init_config_tab(self):
         """Inicializa aba de configurações - OCUPANDO TODA A ÁREA"""
-        from tkinter import Canvas
-        
-        # Canvas com scroll
-        canvas = Canvas(self.frame_config)
-        scrollbar = ttk.Scrollbar(self.frame_config, orient="vertical", command=canvas.yview)
-        
-        # Frame scrollável
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Frame principal ocupando toda a largura
-        main_frame = ttk.Frame(scrollable_frame)
+        # Frame ttk direto na aba: sem Canvas + scrollbar + reflow de
+        # <Configure>, menos widgets e menos handlers de evento
+        main_frame = ttk.Frame(self.frame_config)
         main_frame.pack(fill="both", expand=True, padx=50, pady=30)
         
         # Configurações gerais
@@ -529,6 +906,13 @@ class App:
         ttk.Label(general_frame, text="Coeficiente:").grid(row=row, column=0, sticky=W, pady=8, padx=(0, 20))
         self.var_coefficient = DoubleVar(value=self.config["coefficient"])
         ttk.Entry(general_frame, textvariable=self.var_coefficient, width=15).grid(row=row, column=1, sticky=W)
+
+        row += 1
+        ttk.Label(general_frame, text="Tolerância de comprimento (mm):").grid(row=row, column=0, sticky=W, pady=8, padx=(0, 20))
+        self.var_length_tol = DoubleVar(value=self.config["length_tol"])
+        ttk.Entry(general_frame, textvariable=self.var_length_tol, width=15).grid(row=row, column=1, sticky=W)
+        ttk.Label(general_frame, text="menor = mais preciso e mais lento",
+                  foreground="#666").grid(row=row, column=2, sticky=W, padx=(10, 0))
         
         # Tamanhos das chapas
         size_frame = ttk.LabelFrame(main_frame, text="Tamanhos das Chapas (mm)", padding=20)
@@ -603,6 +987,7 @@ class App:
         """Atualiza self.config com valores da UI"""
         self.config["minute_price"] = self.var_minute_price.get()
         self.config["coefficient"] = self.var_coefficient.get()
+        self.config["length_tol"] = self.var_length_tol.get()
         
         for material in self.size_vars:
             self.config["sheet_sizes"][material]["w"] = self.size_vars[material]["w"].get()
@@ -615,7 +1000,9 @@ class App:
         for material in self.speed_vars:
             for thickness, var in self.speed_vars[material].items():
                 self.config["cut_speed"][material][thickness] = var.get()
-    
+
+        self._compute = make_price_computers(self.config)
+
     def save_config_ui(self):
         """Salva configurações da UI"""
         self._update_config_from_ui()
@@ -627,10 +1014,11 @@ class App:
     def reset_config_ui(self):
         """Restaura configurações padrão"""
         if messagebox.askyesno("Confirmar", "Restaurar configurações padrão?"):
-            self.config = json.loads(json.dumps(DEFAULT_CONFIG))
+            self.config = default_config()
             
             self.var_minute_price.set(self.config["minute_price"])
             self.var_coefficient.set(self.config["coefficient"])
+            self.var_length_tol.set(self.config["length_tol"])
             
             for material in self.size_vars:
                 self.size_vars[material]["w"].set(self.config["sheet_sizes"][material]["w"])
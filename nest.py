@@ -6,18 +6,22 @@
 # - **Saída limpa**: imprime e salva **apenas a vencedora**.
 #
 # Dependências:
-#   pip install shapely>=2.0 ezdxf rtree
+#   pip install shapely>=2.0 ezdxf
 #
 # Observação: lógica de encaixe (ordem, first_touch, decisão cabe/não cabe) permanece idêntica.
 # Apenas aceleramos a checagem de colisão e adicionamos variações de estratégia.
 
-import sys, argparse, os, io
+import sys, argparse, os, io, json, math
+import multiprocessing
 import ezdxf
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from contextlib import redirect_stdout, contextmanager
+from functools import lru_cache
+
+import shapely.wkb
 
 from ezdxf.path import make_path
-from shapely.geometry import Polygon, LineString
 from shapely.ops import unary_union, polygonize
 from shapely.affinity import translate as shp_translate, rotate as shp_rotate
 from shapely.prepared import prep
@@ -37,18 +41,16 @@ def silence(quiet: bool):
 # ============================================================
 # Colisão acelerada (índice espacial + prepared)
 # ============================================================
-try:
-    from rtree import index as rtree_index
-    HAVE_RTREE = True
-except Exception:
-    HAVE_RTREE = False
-
 class CollisionIndex:
     """
     Mantém a lógica 'colide/não colide' idêntica:
       antes: cand.buffer(m).intersects(other)
       agora: other.buffer(m).intersects(cand)
     É equivalente geométrico; buffer é feito 1x por peça adicionada.
+
+    Broad-phase: STRtree do shapely reconstruída preguiçosamente (a cada
+    ~√n inserções); os itens pendentes desde a última reconstrução passam
+    por uma máscara bbox vetorizada. A narrow-phase continua nos prepared.
     """
     def __init__(self, margin_half=0.0):
         self.margin_half = margin_half
@@ -56,15 +58,20 @@ class CollisionIndex:
         self.items_buf = []
         self.items_prep = []
         self.bounds = []
+        # Bboxes em SoA: quatro arrays contíguos crescidos por dobra. A
+        # varredura dos pendentes vira comparações vetorizadas por coluna
+        # (cada array é denso na memória, sem o stride do (N,4))
+        self._bx0 = np.empty(16, dtype=np.float64)
+        self._by0 = np.empty(16, dtype=np.float64)
+        self._bx1 = np.empty(16, dtype=np.float64)
+        self._by1 = np.empty(16, dtype=np.float64)
         self.count = 0
-        self.idx = None
-        if HAVE_RTREE:
-            p = rtree_index.Property()
-            p.interleaved = True
-            self.idx = rtree_index.Index(properties=p)
-
-    def add(self, geom):
-        gbuf = geom.buffer(self.margin_half) if self.margin_half > 0 else geom
+        self._tree = None
+        self._tree_n = 0  # itens cobertos pela árvore atual
+
+    def add(self, geom, gbuf=None):
+        if gbuf is None:
+            gbuf = geom.buffer(self.margin_half) if self.margin_half > 0 else geom
         gprep = prep(gbuf)
         b = gbuf.bounds
         i = self.count
@@ -72,28 +79,113 @@ class CollisionIndex:
         self.items_buf.append(gbuf)
         self.items_prep.append(gprep)
         self.bounds.append(b)
-        if self.idx is not None:
-            self.idx.insert(i, b)
+        if i == self._bx0.shape[0]:
+            for name in ('_bx0', '_by0', '_bx1', '_by1'):
+                grown = np.empty(2 * i, dtype=np.float64)
+                grown[:i] = getattr(self, name)
+                setattr(self, name, grown)
+        self._bx0[i], self._by0[i], self._bx1[i], self._by1[i] = b
         self.count += 1
 
+    def _maybe_rebuild(self):
+        pend = self.count - self._tree_n
+        if pend and pend * pend >= self.count:
+            self._tree = shapely.STRtree(self.items_buf)
+            self._tree_n = self.count
+
+    def _pending_hits(self, cand_bounds):
+        """Índices dos pendentes cujo bbox cruza o do candidato."""
+        lo = self._tree_n
+        n = self.count
+        if lo == n:
+            return ()
+        cx0, cy0, cx1, cy1 = cand_bounds
+        mask = ~((cx1 < self._bx0[lo:n]) | (cx0 > self._bx1[lo:n])
+                 | (cy1 < self._by0[lo:n]) | (cy0 > self._by1[lo:n]))
+        return lo + np.flatnonzero(mask)
+
     def collides(self, cand):
         if not self.items:
             return False
-        if self.idx is not None:
-            cand_bbox = cand.bounds
-            for i in self.idx.intersection(cand_bbox):
+        self._maybe_rebuild()
+        if self._tree_n:
+            for i in self._tree.query(cand):
                 if self.items_prep[i].intersects(cand):
                     return True
-            return False
-        else:
-            # Fallback sem Rtree: broad-phase por bbox + prepared
-            cand_bbox = cand.bounds
-            for i, b in enumerate(self.bounds):
-                if cand_bbox[2] < b[0] or cand_bbox[0] > b[2] or cand_bbox[3] < b[1] or cand_bbox[1] > b[3]:
-                    continue
+        for i in self._pending_hits(cand.bounds):
+            if self.items_prep[i].intersects(cand):
+                return True
+        return False
+
+    def collides_batch(self, cands):
+        """Máscara booleana de colisão para um lote de candidatos.
+
+        Uma única query C com predicate='intersects' cobre o lote inteiro;
+        força a árvore completa antes (um lote amortiza a reconstrução).
+        """
+        out = np.zeros(len(cands), dtype=bool)
+        if not self.items:
+            return out
+        if self._tree_n < self.count:
+            self._tree = shapely.STRtree(self.items_buf)
+            self._tree_n = self.count
+        hit = self._tree.query(np.asarray(cands, dtype=object),
+                               predicate='intersects')
+        out[hit[0]] = True
+        return out
+
+    def last_blocker(self, cand):
+        """Checagem barata só contra o último item adicionado.
+
+        Na varredura contígua o bloqueador é quase sempre a peça recém
+        colocada; um teste bbox + prepared evita a consulta ao índice
+        enquanto o candidato ainda desliza sobre ela.
+        """
+        if not self.items:
+            return None
+        i = self.count - 1
+        b = self.bounds[i]
+        cb = cand.bounds
+        if cb[2] < b[0] or cb[0] > b[2] or cb[3] < b[1] or cb[1] > b[3]:
+            return None
+        if self.items_prep[i].intersects(cand):
+            return b
+        return None
+
+    def blockers(self, cand):
+        """Bounds (bufferizados) dos itens que intersectam cand; [] se livre."""
+        out = []
+        if not self.items:
+            return out
+        self._maybe_rebuild()
+        if self._tree_n:
+            for i in self._tree.query(cand):
                 if self.items_prep[i].intersects(cand):
-                    return True
-            return False
+                    out.append(self.bounds[i])
+        for i in self._pending_hits(cand.bounds):
+            if self.items_prep[i].intersects(cand):
+                out.append(self.bounds[i])
+        return out
+
+@lru_cache(maxsize=64)
+def _buffered_by_wkb(wkb_bytes, margin_half):
+    """Buffer memoizado por (wkb, margem).
+
+    As peças colocadas são sempre translações de poucas orientações base;
+    buffer() é caro no shapely e comuta com translação, então pagamos 1x
+    por orientação e transladamos o resultado.
+    """
+    return shapely.wkb.loads(wkb_bytes).buffer(margin_half)
+
+def _add_placed(coll_idx, placed_geom, base_piece, margin_half):
+    """Insere uma translação de base_piece reaproveitando o buffer memoizado."""
+    if margin_half > 0:
+        tpl_buf = _buffered_by_wkb(base_piece.wkb, margin_half)
+        dx = placed_geom.bounds[0] - base_piece.bounds[0]
+        dy = placed_geom.bounds[1] - base_piece.bounds[1]
+        coll_idx.add(placed_geom, gbuf=shp_translate(tpl_buf, xoff=dx, yoff=dy))
+    else:
+        coll_idx.add(placed_geom)
 
 # ============================================================
 # Leitura e construcao do poligono da peca
@@ -101,19 +193,82 @@ class CollisionIndex:
 SKIP_TYPES = frozenset({"TEXT", "MTEXT", "DIMENSION"})
 
 def collect_all_lines(msp, tol=0.5):
-    lines = []
+    # Acumula todos os vértices achatados em um buffer único + índice de
+    # subcaminho e constrói as LineStrings em lote (shapely 2.0), sem uma
+    # lista de tuplas Python por subcaminho
+    flat = []
+    indices = []
+    n_lines = 0
     for e in msp:
         if e.dxftype() in SKIP_TYPES:
             continue
         try:
             p = make_path(e)
-            for sub in p.sub_paths():
-                pts = [(v.x, v.y) for v in sub.flattening(tol)]
-                if len(pts) >= 2:
-                    lines.append(LineString(pts))
-        except:
-            pass
-    return lines
+        except (AttributeError, TypeError, ValueError, ezdxf.DXFError):
+            continue
+        for sub in p.sub_paths():
+            start = len(flat)
+            for v in sub.flattening(tol):
+                flat.append(v.x)
+                flat.append(v.y)
+            n_pts = (len(flat) - start) // 2
+            if n_pts >= 2:
+                indices.extend([n_lines] * n_pts)
+                n_lines += 1
+            else:
+                del flat[start:]
+    if not flat:
+        return []
+    coords = np.array(flat, dtype=np.float64).reshape(-1, 2)
+    return list(shapely.linestrings(coords, indices=np.array(indices, dtype=np.int64)))
+
+Q_GRID = 100.0  # vértices na grade de 1/Q_GRID mm (0,01 mm)
+
+def _quantized_polygon(ring_coords):
+    """Polígono do envelope com vértices quantizados na grade de 0,01 mm.
+
+    A precisão abaixo disso vinda do achatamento (tol=0,5 mm) é ruído.
+    Na grade, translações/orientações iguais produzem WKB idêntico byte a
+    byte — o que estabiliza as chaves dos caches por WKB — e vértices
+    coincidentes comparam exatos.
+    """
+    arr = np.asarray(ring_coords, dtype=np.float64)
+    return shapely.polygons(np.round(arr * Q_GRID) / Q_GRID)
+
+def _snap_endpoint_lines(lines, snap_tolerance):
+    """Reconstrói as linhas aglutinando extremos próximos.
+
+    STRtree sobre os extremos + union-find: pares a até snap_tolerance
+    viram um aglomerado e cada extremo membro é substituído pelo centroide.
+    O(N log N) contra o O(N²) do unary_union de segmentos bufferizados, e
+    sem engordar a peça pelo raio do buffer.
+    """
+    coords, idx = shapely.get_coordinates(lines, return_index=True)
+    starts = np.searchsorted(idx, np.arange(len(lines) + 1))
+    end_pos = np.concatenate((starts[:-1], starts[1:] - 1))
+    pts = shapely.points(coords[end_pos])
+    tree = shapely.STRtree(pts)
+    src, dst = tree.query(pts, predicate='dwithin', distance=snap_tolerance)
+
+    parent = list(range(len(end_pos)))
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for a, b in zip(src, dst):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+
+    roots = np.array([find(a) for a in range(len(end_pos))])
+    snapped = coords.copy()
+    for r in np.unique(roots):
+        members = end_pos[roots == r]
+        snapped[members] = coords[members].mean(axis=0)
+    return list(shapely.linestrings(snapped, indices=idx))
 
 def create_closed_polygon(msp, tol=0.5, snap_tolerance=1.0):
     lines = collect_all_lines(msp, tol)
@@ -138,10 +293,25 @@ def create_closed_polygon(msp, tol=0.5, snap_tolerance=1.0):
                 print(f"⚠️ Furo detectado")
                 raise Exception("Furo")
             print(f"✅ Polígono: {largest.area:.0f}mm²")
-            return Polygon(largest.exterior.coords), Polygon(largest.exterior.coords)
+            env = _quantized_polygon(largest.exterior.coords)
+            return env, env
     except:
         pass
 
+    # Antes do buffer caro: snap dos extremos e nova tentativa de polygonize
+    print(f"🧲 Snap de extremos...")
+    try:
+        snapped = _snap_endpoint_lines(lines, snap_tolerance)
+        polys = list(polygonize(snapped))
+        if polys:
+            largest = max(polys, key=lambda p: p.area)
+            if largest.area >= bbox_area * 0.01:
+                print(f"✅ Polígono (snap): {largest.area:.0f}mm²")
+                env = _quantized_polygon(largest.exterior.coords)
+                return env, env
+    except Exception:
+        pass
+
     print(f"🔄 Buffer...")
     try:
         buffered = [line.buffer(snap_tolerance) for line in lines]
@@ -154,7 +324,8 @@ def create_closed_polygon(msp, tol=0.5, snap_tolerance=1.0):
         w = b[2] - b[0]
         h = b[3] - b[1]
         print(f"✅ {w:.0f}x{h:.0f}mm")
-        return Polygon(largest.exterior.coords), Polygon(largest.exterior.coords)
+        env = _quantized_polygon(largest.exterior.coords)
+        return env, env
     except:
         pass
 
@@ -167,6 +338,20 @@ def normalize_polygon(poly):
     b = poly.bounds
     return shp_translate(poly, xoff=-b[0], yoff=-b[1])
 
+@lru_cache(maxsize=32)
+def _rot90_norm(poly_wkb):
+    """Peça girada 90° e normalizada, memoizada por WKB.
+
+    As estratégias *_rot90 e a fase 2 repetem exatamente o mesmo
+    rotate+translate sobre a mesma peça; com os vértices na grade o WKB é
+    determinístico por geometria e serve de chave estável entre jobs.
+    """
+    return normalize_polygon(shp_rotate(shapely.from_wkb(poly_wkb), 90,
+                                        origin='centroid'))
+
+def rot90_normalized(poly_piece):
+    return _rot90_norm(shapely.to_wkb(poly_piece))
+
 def apply_transform(poly, angle_deg=0.0, x=0.0, y=0.0):
     q = poly
     if angle_deg != 0.0:
@@ -183,11 +368,10 @@ def find_empty_rectangle(sheet_w, sheet_h, placed_pieces, margin, min_area_ratio
 
     print(f"\n🔍 Detectando área vazia...")
 
-    all_bounds = [p.bounds for p in placed_pieces]
-    min_x = min(b[0] for b in all_bounds)
-    min_y = min(b[1] for b in all_bounds)
-    max_x = max(b[2] for b in all_bounds)
-    max_y = max(b[3] for b in all_bounds)
+    # Bboxes em bloco (uma chamada C) + reduções NumPy, sem geradores Python
+    bnds = shapely.bounds(np.asarray(placed_pieces, dtype=object))
+    min_x, min_y = bnds[:, 0].min(), bnds[:, 1].min()
+    max_x, max_y = bnds[:, 2].max(), bnds[:, 3].max()
 
     print(f"   Área ocupada: ({min_x:.0f}, {min_y:.0f}) até ({max_x:.0f}, {max_y:.0f})")
 
@@ -229,96 +413,250 @@ def find_empty_rectangle(sheet_w, sheet_h, placed_pieces, margin, min_area_ratio
     return (best['x'], best['y'], best['w'], best['h'])
 
 # ============================================================
-# FASE 1: Preenchimento principal (faixas)
+# FASE 1: Preenchimento principal (skyline)
 # ============================================================
+def _translated(coords, dx, dy):
+    """Polígono transladado construído direto do array do anel exterior.
+
+    As peças não têm furos (só o envelope), então somar o offset ao array
+    e reconstruir via shapely.polygons evita o caminho genérico do
+    affinity.translate a cada candidato.
+    """
+    return shapely.polygons(coords + (dx, dy))
+
+def _is_axis_rect(poly):
+    """True se o envelope é um retângulo alinhado aos eixos.
+
+    Só nesse caso o salto por bbox das varreduras é seguro: o candidato
+    retangular deixa de intersectar um bloqueador exatamente quando sai
+    do bbox dele. Qualquer outro contorno — mesmo convexo: triângulos
+    0°/180° se encaixam com os bboxes sobrepostos — pode destravar ainda
+    dentro do bbox, e o salto pularia esses encaixes. Fora do retângulo a
+    varredura fica na grade do passo, com checagem real de colisão.
+    """
+    b = poly.bounds
+    return (b[2] - b[0]) * (b[3] - b[1]) <= poly.area * 1.000001
+
+def _skyline_splice(skyline, u0, u1, v_new):
+    """Atualiza o perfil superior após apoiar uma peça no trecho [u0, u1].
+
+    Recorta os segmentos cobertos, insere o novo topo e funde vizinhos de
+    mesma altura para manter a lista curta.
+    """
+    out = []
+    for (s, e, v) in skyline:
+        if e <= u0 or s >= u1:
+            out.append((s, e, v))
+            continue
+        if s < u0:
+            out.append((s, u0, v))
+        if e > u1:
+            out.append((u1, e, v))
+    out.append((u0, u1, v_new))
+    out.sort()
+    merged = [out[0]]
+    for s, e, v in out[1:]:
+        ls, le, lv = merged[-1]
+        if abs(lv - v) < 1e-9 and abs(s - le) < 1e-9:
+            merged[-1] = (ls, e, lv)
+        else:
+            merged.append((s, e, v))
+    return merged
+
 def fill_phase_1(poly_piece, count, margin, sheet_w, sheet_h, direction='x', alternate_180=False):
+    """Empacotamento skyline bottom-left no eixo da faixa.
+
+    Em vez de fechar cada faixa na altura da peça mais alta, mantém o perfil
+    superior das peças colocadas como segmentos (início, fim, altura) e apoia
+    cada peça no ponto mais baixo onde sua largura cabe. Para peças de alturas
+    iguais degenera nas mesmas faixas de antes; para alturas mistas aproveita
+    os degraus. O CollisionIndex continua decidindo a colisão real (margem,
+    concavidades), com o mesmo salto estilo NFP na grade do passo.
+    """
     placed = []
     total = 0
     margin_half = margin * 0.5
-    placed_bounds = []
     piece_counter = 0
 
-    print(f"\n🔷 FASE 1: Preenchimento em faixas {'horizontais' if direction == 'x' else 'verticais'}")
+    print(f"\n🔷 FASE 1: Preenchimento {'horizontal' if direction == 'x' else 'vertical'}")
 
     coll_idx = CollisionIndex(margin_half=margin_half)
 
+    piece_normalized_base = normalize_polygon(poly_piece)
+    # Variantes 0°/180° (e seus anéis exteriores) calculadas uma única vez:
+    # a alternância só escolhe entre as duas, sem rotate+normalize por peça
+    piece_0 = piece_normalized_base
+    piece_180 = (normalize_polygon(shp_rotate(piece_0, 180, origin=(0.0, 0.0)))
+                 if alternate_180 else piece_0)
+    coords_0 = np.asarray(piece_0.exterior.coords)
+    coords_180 = (np.asarray(piece_180.exterior.coords)
+                  if alternate_180 else coords_0)
+    rect_piece = _is_axis_rect(piece_0)  # rotação 180° preserva o envelope
+    step = 2.0
+
+    if rect_piece:
+        # --- Skyline bottom-left (só envelope retangular) ---
+        # O perfil registra o topo do bbox de cada peça; qualquer outro
+        # contorno (mesmo convexo) encaixa DENTRO do bbox da vizinha, o
+        # que o perfil não representa — esses vão pela varredura first-touch
+        # abaixo. Domínio: x para faixas horizontais, y para verticais
+        # (a "altura" é o outro eixo).
+        max_u = sheet_w if direction == 'x' else sheet_h
+        limit_v = sheet_h if direction == 'x' else sheet_w
+        skyline = [(0.0, max_u, 0.0)]
+
+        def span_height(u, pu):
+            v = 0.0
+            for s, e, h in skyline:
+                if e <= u:
+                    continue
+                if s >= u + pu:
+                    break
+                if h > v:
+                    v = h
+            return v
+
+        while total < count:
+            if alternate_180 and (piece_counter % 2 == 1):
+                current_piece, cur_coords = piece_180, coords_180
+            else:
+                current_piece, cur_coords = piece_0, coords_0
+
+            pb = current_piece.bounds
+            pw, ph = pb[2] - pb[0], pb[3] - pb[1]
+            pu, pv = (pw, ph) if direction == 'x' else (ph, pw)
+
+            # Candidatos: início de cada segmento, do mais baixo ao mais à
+            # esquerda (bottom-left clássico)
+            cands = sorted((span_height(s, pu), s)
+                           for s, _e, _h in skyline if s + pu <= max_u)
+
+            placed_geom = None
+            for _v_base, u_start in cands:
+                u = u_start
+                # Desliza a partir do ponto do perfil; o salto por bbox é
+                # seguro aqui porque só envelopes retangulares usam este
+                # caminho
+                while u + pu <= max_u:
+                    v = span_height(u, pu)
+                    v_place = v + margin if v > 0 else v
+                    if v_place + pv > limit_v:
+                        break
+                    dx, dy = (u, v_place) if direction == 'x' else (v_place, u)
+                    cand = _translated(cur_coords, dx, dy)
+                    blk = coll_idx.blockers(cand)
+                    if not blk:
+                        placed_geom = cand
+                        break
+                    if direction == 'x':
+                        jump = max(b[2] for b in blk) - cand.bounds[0]
+                    else:
+                        jump = max(b[3] for b in blk) - cand.bounds[1]
+                    u += max(math.ceil(jump / step), 1) * step
+                if placed_geom is not None:
+                    break
+
+            if placed_geom is None:
+                break
+
+            placed.append(placed_geom)
+            _add_placed(coll_idx, placed_geom, current_piece, margin_half)
+            total += 1
+            piece_counter += 1
+
+            gb = placed_geom.bounds
+            if direction == 'x':
+                u0, u1, v_top = gb[0], gb[2], gb[3]
+            else:
+                u0, u1, v_top = gb[1], gb[3], gb[2]
+            skyline = _skyline_splice(skyline, u0, u1, v_top)
+
+        print(f"   ✅ Fase 1: {total} peças colocadas")
+        return placed, total
+
+    # --- Faixas + first-touch (envelope não retangular) ---
+    # Varredura na grade do passo contra a geometria real: é ela que acha
+    # os encaixes (triângulo/peça 180° entrando no vão da vizinha) que o
+    # perfil de bbox do skyline não consegue expressar.
     def fits_sheet(geom):
         x1, y1, x2, y2 = geom.bounds
         return (x1 >= 0) and (y1 >= 0) and (x2 <= sheet_w) and (y2 <= sheet_h)
 
-    def collides(cand):
-        return coll_idx.collides(cand)
-
     def first_touch(base_geom, direction):
-        from shapely.affinity import translate as t
-        step = 2.0
+        coords = np.asarray(base_geom.exterior.coords)
+        b0 = base_geom.bounds
+        ax = 0 if direction == 'x' else 1
+        K = 8  # sondas por lote
         shift = 0.0
         while shift < 20000:
-            cand = t(base_geom,
-                     xoff=shift if direction == 'x' else 0.0,
-                     yoff=shift if direction == 'y' else 0.0)
+            cand = _translated(coords,
+                               shift if ax == 0 else 0.0,
+                               shift if ax == 1 else 0.0)
             if not fits_sheet(cand):
                 break
-            if not collides(cand):
+            if coll_idx.last_blocker(cand) is None and \
+                    not coll_idx.blockers(cand):
                 return cand
-            shift += step
+            # Próximos K passos da grade em um único lote (mesma ordem da
+            # varredura passo a passo, ver fase 2)
+            shifts = shift + step * np.arange(1, K + 1)
+            if ax == 0:
+                ok = shifts + b0[2] <= sheet_w
+            else:
+                ok = shifts + b0[3] <= sheet_h
+            n_ok = K if ok.all() else int(np.argmin(ok))
+            if n_ok == 0:
+                break
+            shifts = shifts[:n_ok]
+            offs = np.zeros((n_ok, 1, 2))
+            offs[:, 0, ax] = shifts
+            cands = shapely.polygons(coords[None, :, :] + offs)
+            free = np.flatnonzero(~coll_idx.collides_batch(cands))
+            if free.size:
+                return cands[free[0]]
+            shift = float(shifts[-1])
         return None
 
-    piece_normalized_base = normalize_polygon(poly_piece)
     x0, y0 = 0.0, 0.0
-
     while total < count:
-        # CORREÇÃO: Alternância 180° corrigida
         if alternate_180 and (piece_counter % 2 == 1):
-            # Rotaciona 180° mantendo o mesmo ponto de origem
-            current_piece = shp_rotate(piece_normalized_base, 180, origin=(0.0, 0.0))
-            current_piece = normalize_polygon(current_piece)
+            current_piece, cur_coords = piece_180, coords_180
         else:
-            current_piece = piece_normalized_base
+            current_piece, cur_coords = piece_0, coords_0
 
-        placed_geom = shp_translate(current_piece, xoff=x0, yoff=y0)
-        if not fits_sheet(placed_geom) or collides(placed_geom):
+        placed_geom = _translated(cur_coords, x0, y0)
+        if not fits_sheet(placed_geom) or coll_idx.collides(placed_geom):
             break
 
         placed.append(placed_geom)
-        placed_bounds.append(placed_geom.bounds)
-        coll_idx.add(placed_geom)
+        _add_placed(coll_idx, placed_geom, current_piece, margin_half)
         total += 1
         piece_counter += 1
         base_geom = placed_geom
 
         while total < count:
-            # CORREÇÃO: Alternância 180° corrigida
             if alternate_180 and (piece_counter % 2 == 1):
-                current_piece = shp_rotate(piece_normalized_base, 180, origin=(0.0, 0.0))
-                current_piece = normalize_polygon(current_piece)
+                current_piece, cur_coords = piece_180, coords_180
             else:
-                current_piece = piece_normalized_base
+                current_piece, cur_coords = piece_0, coords_0
 
-            next_template = shp_translate(
-                current_piece,
-                xoff=base_geom.bounds[0],
-                yoff=base_geom.bounds[1]
-            )
-
-            next_geom = first_touch(next_template, direction)
+            base_b = base_geom.bounds
+            next_geom = first_touch(_translated(cur_coords, base_b[0], base_b[1]),
+                                    direction)
             if next_geom is None:
                 break
 
             placed.append(next_geom)
-            placed_bounds.append(next_geom.bounds)
-            coll_idx.add(next_geom)
+            _add_placed(coll_idx, next_geom, current_piece, margin_half)
             total += 1
             piece_counter += 1
             base_geom = next_geom
 
         if direction == 'x':
-            max_y_line = max((p.bounds[3] for p in placed), default=0.0)
-            y0 = max_y_line + margin
+            y0 = max(p.bounds[3] for p in placed) + margin
             x0 = 0.0
         else:
-            max_x_line = max((p.bounds[2] for p in placed), default=0.0)
-            x0 = max_x_line + margin
+            x0 = max(p.bounds[2] for p in placed) + margin
             y0 = 0.0
 
     print(f"   ✅ Fase 1: {total} peças colocadas")
@@ -349,13 +687,19 @@ def fill_phase_2_smart(poly_piece, count, margin, sheet_w, sheet_h, placed_phase
 
     orientations_to_test = []
     orientations_to_test.append({'piece': poly_piece, 'rotation': 0, 'name': 'original 0°'})
-    piece_rot90 = normalize_polygon(shp_rotate(poly_piece, 90, origin='centroid'))
+    piece_rot90 = rot90_normalized(poly_piece)
     orientations_to_test.append({'piece': piece_rot90, 'rotation': 90, 'name': 'rotacionada 90°'})
 
     print(f"\n   🔬 Testando todas combinações (2 orientações x 2 direções = 4 testes)...")
 
     margin_half = margin * 0.5
 
+    # Buffer das peças da fase 1 pago uma vez, não por combinação testada
+    if margin_half > 0:
+        phase1_bufs = [p.buffer(margin_half) for p in placed_phase1]
+    else:
+        phase1_bufs = list(placed_phase1)
+
     def fits_empty_rect(geom):
         x1, y1, x2, y2 = geom.bounds
         return (x1 >= empty_x) and (y1 >= empty_y) and \
@@ -367,39 +711,88 @@ def fill_phase_2_smart(poly_piece, count, margin, sheet_w, sheet_h, placed_phase
         test_counter = len(test_placed)
 
         comb_idx = CollisionIndex(margin_half=margin_half)
-        for p in placed_phase1:
-            comb_idx.add(p)
+        for p, pbuf in zip(placed_phase1, phase1_bufs):
+            comb_idx.add(p, gbuf=pbuf)
 
         piece_normalized = normalize_polygon(piece_to_use)
+        pn_b = piece_normalized.bounds  # invariante do loop
+        piece_area = piece_normalized.area
+        rect_piece = _is_axis_rect(piece_normalized)
+        # Mesmo pré-cálculo 0°/180° da fase 1
+        piece_0 = piece_normalized
+        piece_180 = (normalize_polygon(shp_rotate(piece_0, 180, origin=(0.0, 0.0)))
+                     if alternate_180 else piece_0)
+        coords_0 = np.asarray(piece_0.exterior.coords)
+        coords_180 = (np.asarray(piece_180.exterior.coords)
+                      if alternate_180 else coords_0)
         x0, y0 = empty_x, empty_y
 
         def _collides(cand):
             return comb_idx.collides(cand)
 
         def _first_touch(base_geom, direction):
-            from shapely.affinity import translate as t
+            coords = np.asarray(base_geom.exterior.coords)
+            b0 = base_geom.bounds
+            ax = 0 if direction == 'x' else 1
             step = 2.0
+            K = 8  # sondas por lote no caminho degradado
             shift = 0.0
             while shift < 20000:
-                cand = t(base_geom,
-                         xoff=shift if direction == 'x' else 0.0,
-                         yoff=shift if direction == 'y' else 0.0)
+                cand = _translated(coords,
+                                   shift if ax == 0 else 0.0,
+                                   shift if ax == 1 else 0.0)
                 if not fits_empty_rect(cand):
                     break
-                if not _collides(cand):
-                    return cand
-                shift += step
+                # Mesmo atalho de predecessor da fase 1
+                b_last = comb_idx.last_blocker(cand)
+                if b_last is not None:
+                    blk = [b_last]
+                else:
+                    blk = comb_idx.blockers(cand)
+                    if not blk:
+                        return cand
+                # Salto por bbox só para envelope retangular (ver
+                # _is_axis_rect): fora dele o candidato pode destravar
+                # dentro do bbox do bloqueador e o salto pularia o encaixe
+                if rect_piece:
+                    if ax == 0:
+                        jump = max(b[2] for b in blk) - cand.bounds[0]
+                    else:
+                        jump = max(b[3] for b in blk) - cand.bounds[1]
+                    if jump > step:
+                        shift += math.ceil(jump / step) * step
+                        continue
+                # Peça não retangular (ou salto improdutivo): em vez de um passo
+                # por iteração, sonda os próximos K passos da grade em um único
+                # lote NumPy + collides_batch. A ordem da grade é preservada,
+                # então o primeiro livre é o mesmo da varredura passo a passo.
+                shifts = shift + step * np.arange(1, K + 1)
+                # fits_empty_rect analítico: só o lado no eixo da varredura
+                # pode passar a falhar conforme o shift cresce
+                if ax == 0:
+                    ok = shifts + b0[2] <= empty_x + empty_w
+                else:
+                    ok = shifts + b0[3] <= empty_y + empty_h
+                n_ok = K if ok.all() else int(np.argmin(ok))
+                if n_ok == 0:
+                    break
+                shifts = shifts[:n_ok]
+                offs = np.zeros((n_ok, 1, 2))
+                offs[:, 0, ax] = shifts
+                cands = shapely.polygons(coords[None, :, :] + offs)
+                free = np.flatnonzero(~comb_idx.collides_batch(cands))
+                if free.size:
+                    return cands[free[0]]
+                shift = float(shifts[-1])
             return None
 
         while test_total < count:
-            # CORREÇÃO: Alternância 180° corrigida
             if alternate_180 and (test_counter % 2 == 1):
-                current_piece = shp_rotate(piece_normalized, 180, origin=(0.0, 0.0))
-                current_piece = normalize_polygon(current_piece)
+                current_piece, cur_coords = piece_180, coords_180
             else:
-                current_piece = piece_normalized
+                current_piece, cur_coords = piece_0, coords_0
 
-            placed_geom = shp_translate(current_piece, xoff=x0, yoff=y0)
+            placed_geom = _translated(cur_coords, x0, y0)
 
             if not fits_empty_rect(placed_geom) or _collides(placed_geom):
                 break
@@ -408,20 +801,19 @@ def fill_phase_2_smart(poly_piece, count, margin, sheet_w, sheet_h, placed_phase
             test_total += 1
             test_counter += 1
             base_geom = placed_geom
-            comb_idx.add(placed_geom)
+            _add_placed(comb_idx, placed_geom, current_piece, margin_half)
 
             while test_total < count:
-                # CORREÇÃO: Alternância 180° corrigida
                 if alternate_180 and (test_counter % 2 == 1):
-                    current_piece = shp_rotate(piece_normalized, 180, origin=(0.0, 0.0))
-                    current_piece = normalize_polygon(current_piece)
+                    current_piece, cur_coords = piece_180, coords_180
                 else:
-                    current_piece = piece_normalized
+                    current_piece, cur_coords = piece_0, coords_0
 
-                next_template = shp_translate(
-                    current_piece,
-                    xoff=base_geom.bounds[0],
-                    yoff=base_geom.bounds[1]
+                base_b = base_geom.bounds
+                next_template = _translated(
+                    cur_coords,
+                    base_b[0],
+                    base_b[1]
                 )
 
                 next_geom = _first_touch(next_template, direction)
@@ -434,19 +826,26 @@ def fill_phase_2_smart(poly_piece, count, margin, sheet_w, sheet_h, placed_phase
                 test_total += 1
                 test_counter += 1
                 base_geom = next_geom
-                comb_idx.add(next_geom)
+                _add_placed(comb_idx, next_geom, current_piece, margin_half)
 
+            # Saída antecipada: nem a altura da peça nem sua área cabem no
+            # que resta do retângulo — dispensa a varredura final inútil
+            base_b = base_geom.bounds
             if direction == 'x':
-                y0 = base_geom.bounds[3] + margin
+                y0 = base_b[3] + margin
                 x0 = empty_x
-                piece_h_local = piece_normalized.bounds[3] - piece_normalized.bounds[1]
-                if y0 + piece_h_local > empty_y + empty_h:
+                piece_h_local = pn_b[3] - pn_b[1]
+                remaining_h = (empty_y + empty_h) - y0
+                if y0 + piece_h_local > empty_y + empty_h or \
+                        remaining_h * empty_w < piece_area:
                     break
             else:
-                x0 = base_geom.bounds[2] + margin
+                x0 = base_b[2] + margin
                 y0 = empty_y
-                piece_w_local = piece_normalized.bounds[2] - piece_normalized.bounds[0]
-                if x0 + piece_w_local > empty_x + empty_w:
+                piece_w_local = pn_b[2] - pn_b[0]
+                remaining_w = (empty_x + empty_w) - x0
+                if x0 + piece_w_local > empty_x + empty_w or \
+                        remaining_w * empty_h < piece_area:
                     break
 
         added = test_total - len(placed_phase1)
@@ -456,21 +855,23 @@ def fill_phase_2_smart(poly_piece, count, margin, sheet_w, sheet_h, placed_phase
     best_count = 0
     best_config = ""
 
-    for orientation_info in orientations_to_test:
-        for direction in ['x', 'y']:
-            direction_name = 'horizontal' if direction == 'x' else 'vertical'
-            config_name = f"{orientation_info['name']} + {direction_name}"
+    # As 4 combinações são independentes (cada uma monta seu CollisionIndex
+    # e só lê placed_phase1); GEOS solta o GIL, então threads bastam.
+    # Resultados colhidos na ordem de submissão p/ manter o desempate.
+    combos = [(oi, d) for oi in orientations_to_test for d in ['x', 'y']]
+    with ThreadPoolExecutor(max_workers=len(combos)) as ex:
+        futs = [ex.submit(test_combination, oi['piece'], d) for oi, d in combos]
+        results = [f.result() for f in futs]
 
-            result_placed, result_total, result_added = test_combination(
-                orientation_info['piece'],
-                direction
-            )
-            print(f"      • {config_name}: +{result_added} peças")
+    for (orientation_info, direction), (result_placed, result_total, result_added) in zip(combos, results):
+        direction_name = 'horizontal' if direction == 'x' else 'vertical'
+        config_name = f"{orientation_info['name']} + {direction_name}"
+        print(f"      • {config_name}: +{result_added} peças")
 
-            if result_added > best_count:
-                best_result = result_placed
-                best_count = result_added
-                best_config = config_name
+        if result_added > best_count:
+            best_result = result_placed
+            best_count = result_added
+            best_config = config_name
 
     if best_result is None or best_count == 0:
         print(f"   ⚠️ Nenhuma combinação conseguiu adicionar peças")
@@ -502,18 +903,20 @@ def strategy_vertical_smart(poly_piece, count, margin, sheet_w, sheet_h, alterna
 
 def strategy_horizontal_smart_rot90(poly_piece, count, margin, sheet_w, sheet_h, alternate_180=False):
     # Peça pré-rotacionada 90° (mantém a mesma lógica, apenas outra orientação base)
-    piece_rot90 = normalize_polygon(shp_rotate(poly_piece, 90, origin='centroid'))
+    piece_rot90 = rot90_normalized(poly_piece)
     return strategy_horizontal_smart(piece_rot90, count, margin, sheet_w, sheet_h, alternate_180)
 
 def strategy_vertical_smart_rot90(poly_piece, count, margin, sheet_w, sheet_h, alternate_180=False):
-    piece_rot90 = normalize_polygon(shp_rotate(poly_piece, 90, origin='centroid'))
+    piece_rot90 = rot90_normalized(poly_piece)
     return strategy_vertical_smart(piece_rot90, count, margin, sheet_w, sheet_h, alternate_180)
 
 # ============================================================
 # COMPETIÇÃO (paralelo) — imprime/salva apenas a vencedora
 # ============================================================
-def _run_strategy(tag, fn_code, poly_piece, count, margin, sheet_w, sheet_h, alternate, quiet):
-    # fn_code mapeia para função específica (evita pickle de funções parciais)
+def _run_strategy(tag, fn_code, poly_wkb, count, margin, sheet_w, sheet_h, alternate, quiet):
+    # fn_code mapeia para função específica (evita pickle de funções parciais);
+    # a peça viaja como WKB (serialização C compacta) e é reconstruída aqui
+    poly_piece = shapely.from_wkb(poly_wkb)
     with silence(quiet):
         if fn_code == "H":
             placed = strategy_horizontal_smart(poly_piece, count, margin, sheet_w, sheet_h, alternate)
@@ -528,6 +931,31 @@ def _run_strategy(tag, fn_code, poly_piece, count, margin, sheet_w, sheet_h, alt
     util = (len(placed) * poly_piece.area) / (sheet_w * sheet_h) * 100.0
     return (tag, placed, util)
 
+# Pool reutilizado entre chamadas: um worker --serve paga a subida dos
+# processos de estratégia uma vez, não a cada job
+_STRATEGY_POOL = None
+
+def _pool_warmup():
+    # Paga os imports pesados na subida do worker, não no primeiro job
+    import shapely, shapely.affinity, shapely.wkb, ezdxf  # noqa: F401
+
+def _strategy_pool(n_jobs):
+    global _STRATEGY_POOL
+    if _STRATEGY_POOL is None:
+        # fork explícito onde existir: os workers herdam o interpretador
+        # quente (shapely/ezdxf já importados), subida em ~ms. forkserver/
+        # spawn re-executam o __main__ do chamador via runpy, o que quebra
+        # o uso embutido (GUI, scripts via stdin). No Windows cai no spawn,
+        # onde o initializer paga os imports na subida, não no primeiro job
+        try:
+            ctx = multiprocessing.get_context('fork')
+        except ValueError:
+            ctx = multiprocessing.get_context('spawn')
+        _STRATEGY_POOL = ProcessPoolExecutor(
+            max_workers=min(n_jobs, os.cpu_count() or 2),
+            mp_context=ctx, initializer=_pool_warmup)
+    return _STRATEGY_POOL
+
 def compete_strategies(poly_piece, count, margin, sheet_w, sheet_h, output_dir, parallel=True, quiet=True):
     # 8 estratégias: H/V, alternada true/false, e as mesmas com peça pré-rotacionada 90°
     jobs = [
@@ -544,22 +972,28 @@ def compete_strategies(poly_piece, count, margin, sheet_w, sheet_h, output_dir,
     os.makedirs(output_dir, exist_ok=True)
     results = []
 
+    # Serializa a peça uma vez; cada submit manda só os bytes
+    poly_wkb = shapely.to_wkb(poly_piece)
+
     if parallel:
         try:
-            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 2)) as ex:
-                futs = []
-                for name, fn_code, alt, _fname in jobs:
-                    futs.append(ex.submit(_run_strategy, name, fn_code, poly_piece, count, margin, sheet_w, sheet_h, alt, quiet))
-                for f in as_completed(futs):
-                    name, placed, util = f.result()
-                    results.append((name, placed, util))
+            ex = _strategy_pool(len(jobs))
+            futs = []
+            for name, fn_code, alt, _fname in jobs:
+                futs.append(ex.submit(_run_strategy, name, fn_code, poly_wkb, count, margin, sheet_w, sheet_h, alt, quiet))
+            for f in as_completed(futs):
+                name, placed, util = f.result()
+                results.append((name, placed, util))
         except Exception:
-            # Fallback sequencial
+            # Fallback sequencial (e descarta o pool possivelmente quebrado)
+            global _STRATEGY_POOL
+            _STRATEGY_POOL = None
             parallel = False
+            results = []
 
     if not parallel:
         for name, fn_code, alt, _fname in jobs:
-            name, placed, util = _run_strategy(name, fn_code, poly_piece, count, margin, sheet_w, sheet_h, alt, quiet)
+            name, placed, util = _run_strategy(name, fn_code, poly_wkb, count, margin, sheet_w, sheet_h, alt, quiet)
             results.append((name, placed, util))
 
     # Escolhe melhor
@@ -593,71 +1027,134 @@ def export_dxf(container_w, container_h, placed, out_path):
         dxfattribs={"closed": True, "color": 7}
     )
 
-    for poly in placed:
-        msp.add_lwpolyline(
-            list(poly.exterior.coords),
-            dxfattribs={"closed": True, "color": 1}
-        )
+    if placed:
+        # Todos os vértices em uma extração C única; uma fatia por peça
+        coords, idx = shapely.get_coordinates(placed, return_index=True)
+        starts = np.searchsorted(idx, np.arange(len(placed) + 1))
+        for i in range(len(placed)):
+            msp.add_lwpolyline(
+                coords[starts[i]:starts[i + 1]].tolist(),
+                dxfattribs={"closed": True, "color": 1}
+            )
 
     doc.saveas(out_path)
 
 # ============================================================
 # Main
 # ============================================================
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--in", dest="infile", required=True)
-    ap.add_argument("--w", type=float, required=True)
-    ap.add_argument("--h", type=float, required=True)
-    ap.add_argument("--margin", type=float, default=0.0)
-    ap.add_argument("--tol", type=float, default=0.5)
-    ap.add_argument("--snap", type=float, default=2.0)
-    ap.add_argument("--out", default="outputs_nesting", help="Diretorio de saida")
-    ap.add_argument("--count", type=int, default=None, help="Numero de pecas (deixe vazio para maximo possivel)")
-    ap.add_argument("--no-parallel", action="store_true", help="Desativa paralelismo na competição")
-    ap.add_argument("--verbose", action="store_true", help="Mostra logs internos das estratégias")
-    args = ap.parse_args()
+@lru_cache(maxsize=8)
+def _load_piece(path_abs, mtime_ns, tol, snap):
+    """Parse do DXF + polígono da peça, memoizados pela identidade do arquivo.
+
+    Workers --serve recebem o mesmo arquivo várias vezes (recalculo, outra
+    chapa); ezdxf.readfile + polygonize são o custo fixo de cada job.
+    """
+    doc = ezdxf.readfile(path_abs)
+    return create_closed_polygon(doc.modelspace(), tol, snap)
+
+def load_piece_polygons(infile, tol=0.5, snap=2.0):
+    path_abs = os.path.abspath(infile)
+    return _load_piece(path_abs, os.stat(path_abs).st_mtime_ns, tol, snap)
 
-    doc = ezdxf.readfile(args.infile)
+def run_job(infile, w, h, margin=0.0, tol=0.5, snap=2.0, out_dir="outputs_nesting",
+            count=None, parallel=True, verbose=False):
+    """Pipeline completo de um nesting; retorna (placed, nome, caminho, util) ou None."""
     print("="*60)
 
-    poly_env, poly_full = create_closed_polygon(doc.modelspace(), args.tol, args.snap)
+    poly_env, poly_full = load_piece_polygons(infile, tol, snap)
     if not poly_env:
-        sys.exit(1)
+        return None
 
     poly_env = normalize_polygon(poly_env)
     b = poly_env.bounds
     piece_area = poly_env.area
-    sheet_area = args.w * args.h
+    sheet_area = w * h
 
     print(f"✅ Peça: {b[2]-b[0]:.1f}x{b[3]-b[1]:.1f} mm | Área: {piece_area:.0f}mm²")
-    print(f"📄 Chapa: {args.w:.0f}x{args.h:.0f} mm | Área: {sheet_area:.0f}mm²")
+    print(f"📄 Chapa: {w:.0f}x{h:.0f} mm | Área: {sheet_area:.0f}mm²")
 
-    if args.count is None:
+    if count is None:
         max_theoretical = int((sheet_area / piece_area) * 1)
-        args.count = max(max_theoretical, 100)
-        print(f"🔢 Count automático: {args.count} peças (preencherá até não caber mais)")
+        count = max(max_theoretical, 100)
+        print(f"🔢 Count automático: {count} peças (preencherá até não caber mais)")
     else:
-        print(f"🔢 Count definido: {args.count} peças")
+        print(f"🔢 Count definido: {count} peças")
 
     print("="*60)
 
     # Executa competição (silencia logs internos se não for verbose)
     placed, winner_name, winner_path, util = compete_strategies(
         poly_env,
-        count=args.count,
-        margin=args.margin,
-        sheet_w=args.w,
-        sheet_h=args.h,
-        output_dir=args.out,
-        parallel=(not args.no_parallel),
-        quiet=(not args.verbose)
+        count=count,
+        margin=margin,
+        sheet_w=w,
+        sheet_h=h,
+        output_dir=out_dir,
+        parallel=parallel,
+        quiet=(not verbose)
     )
 
     # Resumo final (apenas vencedora)
     print(f"🎯 FINAL: {len(placed)} peças | {util:.1f}%")
     print(f"📁 Arquivo salvo: {winner_path}")
     print("="*60)
+    return placed, winner_name, winner_path, util
+
+def serve():
+    """Modo worker persistente: um job JSON por linha no stdin.
+
+    Evita pagar o custo de interpretador + imports a cada nesting; o
+    chamador lê o stdout até encontrar a linha 'FINAL:' de cada job.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            result = run_job(
+                job["in"], job["w"], job["h"],
+                margin=job.get("margin", 0.0),
+                tol=job.get("tol", 0.5),
+                snap=job.get("snap", 2.0),
+                out_dir=job.get("out", "outputs_nesting"),
+                count=job.get("count"),
+            )
+            if result is None:
+                print("ERRO: não foi possível construir o polígono da peça")
+        except Exception as e:
+            print(f"ERRO: {e}")
+        sys.stdout.flush()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--in", dest="infile", default=None)
+    ap.add_argument("--w", type=float, default=None)
+    ap.add_argument("--h", type=float, default=None)
+    ap.add_argument("--margin", type=float, default=0.0)
+    ap.add_argument("--tol", type=float, default=0.5)
+    ap.add_argument("--snap", type=float, default=2.0)
+    ap.add_argument("--out", default="outputs_nesting", help="Diretorio de saida")
+    ap.add_argument("--count", type=int, default=None, help="Numero de pecas (deixe vazio para maximo possivel)")
+    ap.add_argument("--no-parallel", action="store_true", help="Desativa paralelismo na competição")
+    ap.add_argument("--verbose", action="store_true", help="Mostra logs internos das estratégias")
+    ap.add_argument("--serve", action="store_true", help="Modo worker: jobs JSON via stdin")
+    args = ap.parse_args()
+
+    if args.serve:
+        serve()
+        return
+
+    if args.infile is None or args.w is None or args.h is None:
+        ap.error("--in, --w e --h são obrigatórios fora do modo --serve")
+
+    result = run_job(
+        args.infile, args.w, args.h,
+        margin=args.margin, tol=args.tol, snap=args.snap, out_dir=args.out,
+        count=args.count, parallel=(not args.no_parallel), verbose=args.verbose,
+    )
+    if result is None:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file